@@ -0,0 +1,64 @@
+"""Compare per-object model_validate() against the bulk loaders.
+
+Run from the src/ directory:
+
+    python -m gameserver_ctrl.benchmarks.bulk_load
+"""
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+from gameserver_ctrl.benchmarks.fixtures import make_player_dicts, make_server_dicts
+from gameserver_ctrl.domain.minecraft import (
+    MCForgeServer,
+    WhitelistPlayer,
+    load_servers,
+    load_whitelist_players,
+)
+
+PLAYER_COUNT: int = 10_000
+SERVER_COUNT: int = 1_000
+PLAYERS_PER_SERVER: int = 10
+REPEAT: int = 5
+
+
+def best_of(func: Callable[[], object], repeat: int = REPEAT) -> float:
+    """Return the fastest of `repeat` runs of func, in seconds."""
+    _times: list[float] = []
+    for _ in range(repeat):
+        _start = time.perf_counter()
+        func()
+        _times.append(time.perf_counter() - _start)
+
+    return min(_times)
+
+
+def report(label: str, baseline: float, timings: dict[str, float]) -> None:
+    print(f"{label}")
+    for _name, _secs in timings.items():
+        print(f"  {_name:<24} {_secs * 1000:>9.2f} ms  ({baseline / _secs:>5.1f}x)")
+
+
+if __name__ == "__main__":
+    players = make_player_dicts(PLAYER_COUNT)
+    _baseline = best_of(lambda: [WhitelistPlayer.model_validate(p) for p in players])
+    report(
+        f"{PLAYER_COUNT} WhitelistPlayer",
+        _baseline,
+        {
+            "model_validate loop": _baseline,
+            "load_whitelist_players": best_of(lambda: load_whitelist_players(players)),
+        },
+    )
+
+    servers = make_server_dicts(SERVER_COUNT, make_player_dicts(PLAYERS_PER_SERVER))
+    _baseline = best_of(lambda: [MCForgeServer.model_validate(s) for s in servers])
+    report(
+        f"{SERVER_COUNT} MCForgeServer ({PLAYERS_PER_SERVER} players each)",
+        _baseline,
+        {
+            "model_validate loop": _baseline,
+            "load_servers": best_of(lambda: load_servers(servers)),
+        },
+    )
@@ -0,0 +1,31 @@
+"""Synthetic fleet data shared by the benchmarks."""
+from __future__ import annotations
+
+from uuid import uuid4
+
+def make_player_dicts(count: int) -> list[dict]:
+    """Return count whitelist player dicts with random ids."""
+    return [{"id": str(uuid4()), "name": f"player{i}"} for i in range(count)]
+
+
+def make_server_dicts(count: int, players: list[dict]) -> list[dict]:
+    """Return count Forge server dicts, each whitelisting the same players."""
+    return [
+        {
+            "name": f"forge_server_{i}",
+            "env_file": {
+                "env_data": {
+                    "image_tag": "java17",
+                    "container_name": f"mc-server_forge_{i}",
+                    "server_port": 25565 + i,
+                    "server_type": "FORGE",
+                    "server_ver": "1.20.1",
+                    "whitelist_enable": True,
+                    "modrinth_project_slugs": "journeymap, jei",
+                }
+            },
+            "whitelist_file": {"whitelist_players": players},
+            "compose_file": {},
+        }
+        for i in range(count)
+    ]
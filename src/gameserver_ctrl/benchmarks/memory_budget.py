@@ -0,0 +1,148 @@
+"""Check peak memory of synthetic large-fleet runs against recorded budgets.
+
+Each scenario loads a synthetic fleet and exports it to a temporary archive
+with a MemoryProfiler attached, then compares every stage's peak memory to the
+budget recorded in memory_budgets.json. Exits non-zero if any stage is over
+budget or has no budget. tests/test_memory_budget.py runs the same check
+under pytest.
+
+Run from the src/ directory:
+
+    python -m gameserver_ctrl.benchmarks.memory_budget
+
+After an intended change in memory use, re-record the budgets (measured peak
+plus BUDGET_HEADROOM) with:
+
+    python -m gameserver_ctrl.benchmarks.memory_budget --record
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import sys
+import tempfile
+from typing import Callable
+
+from gameserver_ctrl.benchmarks.fixtures import make_player_dicts, make_server_dicts
+from gameserver_ctrl.domain.minecraft import (
+    export_fleet,
+    load_servers,
+    load_whitelist_players,
+)
+from gameserver_ctrl.utils.profile_utils import MemoryProfiler
+
+BUDGETS_FILE: Path = Path(__file__).parent / "memory_budgets.json"
+## Budgets are recorded this far above the measured peak, to absorb noise
+BUDGET_HEADROOM: float = 1.2
+
+
+def run_fleet(server_count: int, players_per_server: int) -> MemoryProfiler:
+    """Load & export a synthetic fleet, profiling each stage."""
+    profiler = MemoryProfiler(
+        servers=server_count, players=server_count * players_per_server
+    )
+
+    try:
+        _players = make_player_dicts(players_per_server)
+        _servers = load_servers(
+            make_server_dicts(server_count, _players), profiler=profiler
+        )
+
+        with tempfile.TemporaryDirectory() as _tmp:
+            export_fleet(_servers, f"{_tmp}/fleet.tar.gz", profiler=profiler)
+    finally:
+        profiler.stop()
+
+    return profiler
+
+
+def run_players(player_count: int) -> MemoryProfiler:
+    """Bulk load a large whitelist, profiling the load."""
+    profiler = MemoryProfiler(players=player_count)
+
+    try:
+        load_whitelist_players(make_player_dicts(player_count), profiler=profiler)
+    finally:
+        profiler.stop()
+
+    return profiler
+
+
+SCENARIOS: dict[str, Callable[[], MemoryProfiler]] = {
+    "1k-servers": lambda: run_fleet(server_count=1_000, players_per_server=10),
+    "100k-players": lambda: run_players(player_count=100_000),
+    "100k-players-fleet": lambda: run_fleet(server_count=10, players_per_server=10_000),
+}
+
+
+def load_budgets() -> dict[str, dict[str, int]]:
+    if not BUDGETS_FILE.exists():
+        return {}
+
+    return json.loads(BUDGETS_FILE.read_text())
+
+
+def check(profilers: dict[str, MemoryProfiler]) -> list[str]:
+    """Return a message for every stage that is over, or missing, its budget."""
+    _budgets = load_budgets()
+    _failures: list[str] = []
+
+    for _scenario, _profiler in profilers.items():
+        for _report in _profiler.reports:
+            _budget = _budgets.get(_scenario, {}).get(_report.name)
+            if _budget is None:
+                _failures.append(
+                    f"[{_scenario}] No budget recorded for stage [{_report.name}], run with --record"
+                )
+                continue
+
+            if _report.peak_bytes > _budget:
+                _failures.append(
+                    f"[{_scenario}] Stage [{_report.name}] peaked at {_report.peak_mb:.2f} MB, over its {_budget / 1024**2:.2f} MB budget"
+                )
+
+    return _failures
+
+
+def record(profilers: dict[str, MemoryProfiler]) -> None:
+    _budgets = load_budgets()
+    for _scenario, _profiler in profilers.items():
+        _budgets[_scenario] = {
+            _report.name: int(_report.peak_bytes * BUDGET_HEADROOM)
+            for _report in _profiler.reports
+        }
+
+    BUDGETS_FILE.write_text(json.dumps(_budgets, indent=2, sort_keys=True) + "\n")
+    print(f"Recorded budgets to {BUDGETS_FILE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "scenarios", nargs="*", help=f"Default: all. Options: {', '.join(SCENARIOS)}"
+    )
+    parser.add_argument(
+        "--record", action="store_true", help="Record measured peaks as the new budgets"
+    )
+    args = parser.parse_args()
+
+    for _name in args.scenarios:
+        if _name not in SCENARIOS:
+            parser.error(f"Unknown scenario: {_name}")
+
+    profilers: dict[str, MemoryProfiler] = {}
+    for _name in args.scenarios or SCENARIOS:
+        print(f"== {_name}")
+        profilers[_name] = SCENARIOS[_name]()
+        print(profilers[_name].summary())
+
+    if args.record:
+        record(profilers)
+        sys.exit(0)
+
+    failures = check(profilers)
+    for _failure in failures:
+        print(_failure)
+
+    sys.exit(1 if failures else 0)
@@ -5,7 +5,7 @@ from typing import Union
 
 from dynaconf import settings
 from loguru import logger as log
-from pydantic import BaseModel, Field, ValidationError, validator
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
 class AppSettings(BaseModel):
     env: str = Field(default=settings.ENV, env="ENV")
@@ -17,7 +17,8 @@ class AppSettings(BaseModel):
         default=Path("templates"), env="TEMPLATES_DIR"
     )
 
-    @validator("template_dir", "data_dir")
+    @field_validator("template_dir", "data_dir")
+    @classmethod
     def valid_template_dir(cls, v) -> Path:
         if isinstance(v, str):
             return Path(v)
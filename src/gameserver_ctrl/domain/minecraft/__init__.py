@@ -1,6 +1,47 @@
 from __future__ import annotations
 
-from . import schemas, server_gen
+from . import (
+    loaders,
+    log_analyzer,
+    mod_index,
+    performance,
+    placement,
+    player_lookup,
+    schemas,
+    server_gen,
+    sleep_proxy,
+    startup,
+    watch,
+)
+from .loaders import (
+    load_env_data,
+    load_models,
+    load_servers,
+    load_whitelist_players,
+)
+from .log_analyzer import LogAnalyzer, LogOffsetStore, ServerLagStats
+from .mod_index import (
+    ModCompatibilityError,
+    ModIndex,
+    ModInfo,
+    preflight_check,
+)
+from .performance import (
+    PROFILES,
+    InsufficientMemoryError,
+    PerformanceProfile,
+    PerformanceSettings,
+    apply_profiles,
+    compute_settings,
+)
+from .placement import (
+    FleetHost,
+    PlacementPlan,
+    ServerCostModel,
+    generate_host_trees,
+    plan_placement,
+)
+from .player_lookup import MojangProfileResolver, resolve_whitelist_players
 from .schemas import (
     ForgeServerComposeFile,
     ForgeServerEnvData,
@@ -8,4 +49,25 @@ from .schemas import (
     WhitelistFile,
     WhitelistPlayer,
 )
-from .server_gen import MCForgeServer
+from .server_gen import (
+    MCForgeServer,
+    RecreateServerScript,
+    RenderCache,
+    create_servers,
+    export_fleet,
+)
+from .sleep_proxy import (
+    SleepProxy,
+    SleepProxyConfig,
+    proxied_server,
+    run_proxies,
+)
+from .startup import (
+    BootCostModel,
+    StartupJob,
+    StartupResult,
+    StartupScheduler,
+    jobs_from_servers,
+    start_fleet,
+)
+from .watch import FleetWatcher, load_manifest
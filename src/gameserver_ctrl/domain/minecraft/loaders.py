@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, TypeVar
+
+from gameserver_ctrl.utils.profile_utils import MemoryProfiler, profile_stage
+
+from .schemas import ForgeServerEnvData, WhitelistPlayer
+from .server_gen import MCForgeServer
+
+from loguru import logger as log
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: type[ModelT]) -> TypeAdapter[list[ModelT]]:
+    """Return a cached TypeAdapter that validates a list of `model` in one call.
+
+    Building a TypeAdapter compiles a validator, so adapters are created once
+    per model class and reused for every bulk load.
+    """
+    return TypeAdapter(list[model])
+
+
+def load_models(
+    model: type[ModelT],
+    data: list[dict[str, Any] | ModelT],
+    profiler: MemoryProfiler | None = None,
+) -> list[ModelT]:
+    """Validate a whole list of dicts into `model` instances.
+
+    There is no unvalidated fast path: pydantic-core validates a list faster
+    than model_construct() can build the same instances one at a time.
+
+    Params:
+    -------
+
+    model (type[BaseModel]): The model class to load, i.e. WhitelistPlayer
+    data (list[dict]): Raw dicts (or already-built model instances)
+    profiler (MemoryProfiler): Profile the load as a "load <model>" stage
+    """
+    with profile_stage(profiler, f"load {model.__name__}"):
+        try:
+            return list_adapter(model).validate_python(data)
+        except ValidationError as exc:
+            log.error(
+                f"Error validating [{len(data)}] {model.__name__} object(s). Details: {exc}"
+            )
+
+            raise exc
+
+
+def load_whitelist_players(
+    data: list[dict[str, Any]],
+    profiler: MemoryProfiler | None = None,
+) -> list[WhitelistPlayer]:
+    """Bulk load WhitelistPlayer objects."""
+    return load_models(WhitelistPlayer, data, profiler=profiler)
+
+
+def load_env_data(data: list[dict[str, Any]]) -> list[ForgeServerEnvData]:
+    """Bulk load ForgeServerEnvData objects."""
+    return load_models(ForgeServerEnvData, data)
+
+
+def load_servers(
+    data: list[dict[str, Any]],
+    profiler: MemoryProfiler | None = None,
+) -> list[MCForgeServer]:
+    """Bulk load MCForgeServer objects, including their nested file objects."""
+    return load_models(MCForgeServer, data, profiler=profiler)
@@ -0,0 +1,504 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import re
+import time
+from typing import NamedTuple
+
+from gameserver_ctrl.constants import DATA_DIR
+
+from loguru import logger as log
+from pydantic import BaseModel, Field
+
+## File in DATA_DIR where per-log read offsets are persisted between runs
+log_offsets_file: str = f"{DATA_DIR}/log_offsets.json"
+
+## Number of bytes read from a log file per read() call while tailing
+TAIL_CHUNK_SIZE: int = 64 * 1024
+
+## Leading "[HH:MM:SS]" of vanilla log lines, or "[19Oct2026 12:00:00.123]" of Forge's
+TIMESTAMP_PATTERN: re.Pattern = re.compile(
+    r"^\[(?:\d{1,2}[A-Za-z]{3}\d{4} )?(?P<h>\d{2}):(?P<m>\d{2}):(?P<s>\d{2})(?:\.(?P<ms>\d{1,3}))?\]"
+)
+SECONDS_PER_DAY: int = 24 * 60 * 60
+
+## Precompiled patterns for the events the analyzer tracks. Each pattern is paired
+#  with a cheap substring check, so lines that can't match skip the regex entirely.
+JOIN_MARKER: str = "joined the game"
+JOIN_PATTERN: re.Pattern = re.compile(r"\b(?P<player>[A-Za-z0-9_]{1,16}) joined the game")
+LEAVE_MARKER: str = "left the game"
+LEAVE_PATTERN: re.Pattern = re.compile(r"\b(?P<player>[A-Za-z0-9_]{1,16}) left the game")
+LAG_MARKER: str = "Can't keep up!"
+LAG_PATTERN: re.Pattern = re.compile(
+    r"Can't keep up!.*?Running (?P<ms>\d+)ms or (?P<ticks>\d+) ticks behind"
+)
+CRASH_PATTERNS: dict[str, re.Pattern] = {
+    "crash_report": re.compile(r"---- Minecraft Crash Report ----"),
+    "tick_loop": re.compile(r"Encountered an unexpected exception"),
+    "out_of_memory": re.compile(r"java\.lang\.OutOfMemoryError"),
+    "watchdog": re.compile(r"A single server tick took [\d.]+ seconds"),
+    "mod_loading": re.compile(r"Mod loading has failed|ModLoadingException"),
+}
+## Combined pattern used to reject non-crash lines with a single regex search
+CRASH_ANY_PATTERN: re.Pattern = re.compile(
+    "|".join(f"(?:{p.pattern})" for p in CRASH_PATTERNS.values())
+)
+
+
+class LogEvent(NamedTuple):
+    """A single parsed event from a server log line.
+
+    Params:
+    -------
+
+    server (str): Name of the server the line was read from
+    kind (str): One of "join", "leave", "lag", or "crash"
+    detail (str): Player name for join/leave, crash signature name for crash
+    value (int): Milliseconds behind for lag events, otherwise 0
+    timestamp (float): Seconds since midnight from the line's timestamp, or
+        None if the line has none
+    """
+
+    server: str
+    kind: str
+    detail: str
+    value: int
+    timestamp: float | None = None
+
+
+def parse_timestamp(line: str) -> float | None:
+    """Return seconds since midnight from a log line's leading timestamp, or None."""
+    _match = TIMESTAMP_PATTERN.match(line)
+    if not _match:
+        return None
+
+    return (
+        int(_match.group("h")) * 3600
+        + int(_match.group("m")) * 60
+        + int(_match.group("s"))
+        + int((_match.group("ms") or "0").ljust(3, "0")) / 1000
+    )
+
+
+def clock_seconds(epoch: float) -> float:
+    """Return the local time of day of a Unix timestamp, in seconds since midnight."""
+    _local = time.localtime(epoch)
+
+    return _local.tm_hour * 3600 + _local.tm_min * 60 + _local.tm_sec + epoch % 1
+
+
+class RingBuffer:
+    """Fixed-size numeric ring buffer with a running sum.
+
+    Memory use is constant regardless of how many values are appended; once
+    the buffer is full, each append overwrites the oldest value.
+    """
+
+    __slots__ = ("_values", "_index", "_count", "_sum")
+
+    def __init__(self, size: int = 512) -> None:
+        """Create an empty buffer holding at most size values."""
+        if size < 1:
+            raise ValueError(f"RingBuffer size must be at least 1, got: {size}")
+
+        self._values: list[float] = [0.0] * size
+        self._index: int = 0
+        self._count: int = 0
+        self._sum: float = 0.0
+
+    def __len__(self) -> int:
+        """Return the number of buffered values."""
+        return self._count
+
+    @property
+    def size(self) -> int:
+        return len(self._values)
+
+    def append(self, value: float) -> None:
+        if self._count == len(self._values):
+            self._sum -= self._values[self._index]
+        else:
+            self._count += 1
+
+        self._values[self._index] = value
+        self._sum += value
+        self._index = (self._index + 1) % len(self._values)
+
+    def values(self) -> list[float]:
+        """Return buffered values, oldest first."""
+        if self._count < len(self._values):
+            return self._values[: self._count]
+
+        return self._values[self._index :] + self._values[: self._index]
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._count if self._count else 0.0
+
+    @property
+    def max(self) -> float:
+        return max(self.values(), default=0.0)
+
+    def percentile(self, pct: float) -> float:
+        """Return the nearest-rank percentile (0-100) of buffered values."""
+        if not self._count:
+            return 0.0
+
+        _sorted = sorted(self.values())
+        _rank = max(int(round(pct / 100 * len(_sorted))) - 1, 0)
+
+        return _sorted[min(_rank, len(_sorted) - 1)]
+
+
+class ServerLagStats(BaseModel):
+    """Summary of a server's tick-lag and player activity.
+
+    Params:
+    -------
+
+    server (str): Name of the server
+    lag_events (int): Total "Can't keep up" warnings seen
+    total_ms_behind (int): Sum of milliseconds behind across all lag warnings
+    max_ms_behind (int): Worst single lag warning seen
+    recent_mean_ms (float): Mean ms behind over the rolling window
+    recent_p95_ms (float): 95th percentile ms behind over the rolling window
+    lag_events_per_hour (float): Rate of lag warnings over the rolling window
+    crashes (dict[str, int]): Count of each crash signature seen
+    joins (int): Total player joins seen
+    leaves (int): Total player leaves seen
+    players_online (int): Players currently online according to the log
+    """
+
+    server: str | None = Field(default=None)
+    lag_events: int | None = Field(default=0)
+    total_ms_behind: int | None = Field(default=0)
+    max_ms_behind: int | None = Field(default=0)
+    recent_mean_ms: float | None = Field(default=0.0)
+    recent_p95_ms: float | None = Field(default=0.0)
+    lag_events_per_hour: float | None = Field(default=0.0)
+    crashes: dict[str, int] | None = Field(default_factory=dict)
+    joins: int | None = Field(default=0)
+    leaves: int | None = Field(default=0)
+    players_online: int | None = Field(default=0)
+
+
+class _ServerAggregates:
+    """Rolling aggregates for one server. Memory is bounded by window_size."""
+
+    __slots__ = (
+        "name",
+        "lag_events",
+        "total_ms_behind",
+        "max_ms_behind",
+        "lag_ms",
+        "lag_times",
+        "crashes",
+        "joins",
+        "leaves",
+        "online",
+        "last_clock",
+        "day_offset",
+    )
+
+    def __init__(self, name: str, window_size: int) -> None:
+        """Create empty aggregates for server name."""
+        self.name: str = name
+        self.lag_events: int = 0
+        self.total_ms_behind: int = 0
+        self.max_ms_behind: int = 0
+        self.lag_ms: RingBuffer = RingBuffer(window_size)
+        self.lag_times: RingBuffer = RingBuffer(window_size)
+        self.crashes: dict[str, int] = {}
+        self.joins: int = 0
+        self.leaves: int = 0
+        ## Bounded by the server's player cap, not by log length
+        self.online: set[str] = set()
+        self.last_clock: float | None = None
+        self.day_offset: float = 0.0
+
+    def log_time(self, clock: float) -> float:
+        """Turn a time of day into seconds on a clock that keeps counting past midnight.
+
+        Log timestamps have no date, so a timestamp more than 12 hours before
+        the previous one is taken to be on the next day.
+        """
+        if self.last_clock is not None and clock < self.last_clock - SECONDS_PER_DAY / 2:
+            self.day_offset += SECONDS_PER_DAY
+        self.last_clock = clock
+
+        return self.day_offset + clock
+
+    def summary(self) -> ServerLagStats:
+        _times = self.lag_times.values()
+        _span = _times[-1] - _times[0] if len(_times) > 1 else 0.0
+        _rate = (len(_times) - 1) / _span * 3600 if _span > 0 else 0.0
+
+        return ServerLagStats(
+            server=self.name,
+            lag_events=self.lag_events,
+            total_ms_behind=self.total_ms_behind,
+            max_ms_behind=self.max_ms_behind,
+            recent_mean_ms=self.lag_ms.mean,
+            recent_p95_ms=self.lag_ms.percentile(95),
+            lag_events_per_hour=_rate,
+            crashes=dict(self.crashes),
+            joins=self.joins,
+            leaves=self.leaves,
+            players_online=len(self.online),
+        )
+
+
+class LogOffsetStore:
+    """Persist per-file read offsets so tailing resumes where it left off.
+
+    Offsets are keyed by absolute path and remember the file's inode, so a
+    rotated log (new inode, or a file shorter than the stored offset) is
+    read again from the start.
+    """
+
+    def __init__(self, path: str | Path = log_offsets_file) -> None:
+        """Load stored offsets from path, if it exists."""
+        self.path: Path = Path(path)
+        self._offsets: dict[str, dict[str, int]] = {}
+
+        if self.path.exists():
+            try:
+                self._offsets = json.loads(self.path.read_text())
+            except (OSError, ValueError) as exc:
+                log.warning(
+                    f"Could not read log offsets from [{self.path}], starting fresh. Details: {exc}"
+                )
+
+    def get(self, log_path: str | Path, stat: os.stat_result) -> int:
+        _entry = self._offsets.get(str(Path(log_path).resolve()))
+
+        if not _entry or _entry.get("inode") != stat.st_ino:
+            return 0
+        if _entry.get("offset", 0) > stat.st_size:
+            ## File was truncated in place
+            return 0
+
+        return _entry["offset"]
+
+    def set(self, log_path: str | Path, stat: os.stat_result, offset: int) -> None:
+        self._offsets[str(Path(log_path).resolve())] = {
+            "inode": stat.st_ino,
+            "offset": offset,
+        }
+
+    def save(self) -> None:
+        if not self.path.parent.exists():
+            self.path.parent.mkdir(parents=True)
+
+        _tmp = self.path.with_suffix(".tmp")
+        _tmp.write_text(json.dumps(self._offsets))
+        _tmp.replace(self.path)
+
+
+def parse_line(server: str, line: str) -> LogEvent | None:
+    """Parse a single log line into a LogEvent, or None if it is not interesting."""
+    if LAG_MARKER in line:
+        _match = LAG_PATTERN.search(line)
+        if _match:
+            return LogEvent(
+                server,
+                "lag",
+                _match.group("ticks"),
+                int(_match.group("ms")),
+                parse_timestamp(line),
+            )
+    elif JOIN_MARKER in line:
+        _match = JOIN_PATTERN.search(line)
+        if _match:
+            return LogEvent(
+                server, "join", _match.group("player"), 0, parse_timestamp(line)
+            )
+    elif LEAVE_MARKER in line:
+        _match = LEAVE_PATTERN.search(line)
+        if _match:
+            return LogEvent(
+                server, "leave", _match.group("player"), 0, parse_timestamp(line)
+            )
+    elif CRASH_ANY_PATTERN.search(line):
+        for _name, _pattern in CRASH_PATTERNS.items():
+            if _pattern.search(line):
+                return LogEvent(server, "crash", _name, 0, parse_timestamp(line))
+
+    return None
+
+
+class LogAnalyzer:
+    """Incrementally tail generated servers' logs and keep rolling statistics.
+
+    Register each server's log file with add_source(), then call poll()
+    periodically (or run() to loop). Only bytes appended since the last poll
+    are read, and read offsets are persisted in an offset store so restarts
+    don't re-ingest old lines. All per-server state lives in fixed-size ring
+    buffers, so memory stays flat no matter how long the analyzer runs.
+
+    Params:
+    -------
+
+    window_size (int): Number of recent lag events kept per server
+    offset_store (LogOffsetStore): Where read offsets are persisted
+    """
+
+    def __init__(
+        self, window_size: int = 512, offset_store: LogOffsetStore | None = None
+    ) -> None:
+        """Create an analyzer with no sources registered."""
+        self.window_size: int = window_size
+        self.offset_store: LogOffsetStore = offset_store or LogOffsetStore()
+        self.sources: dict[str, Path] = {}
+        self._stats: dict[str, _ServerAggregates] = {}
+
+    def _aggregates(self, server: str) -> _ServerAggregates:
+        _agg = self._stats.get(server)
+        if _agg is None:
+            _agg = _ServerAggregates(server, self.window_size)
+            self._stats[server] = _agg
+
+        return _agg
+
+    def add_source(self, server: str, log_path: str | Path) -> None:
+        """Register a log file to tail for a server.
+
+        For servers generated from the compose template, this is
+        <server dir>/data/logs/latest.log.
+        """
+        self.sources[server] = Path(log_path)
+        self._aggregates(server)
+
+    def ingest_line(self, server: str, line: str, now: float | None = None) -> LogEvent | None:
+        """Parse a line and fold it into the server's aggregates.
+
+        Lag events are timed by the line's own timestamp, so a backlog read
+        after a restart keeps its real spacing. Lines without one fall back
+        to now (a Unix timestamp, default the current time).
+        """
+        _event = parse_line(server, line)
+        if _event is None:
+            return None
+
+        _agg = self._aggregates(server)
+
+        match _event.kind:
+            case "lag":
+                _agg.lag_events += 1
+                _agg.total_ms_behind += _event.value
+                _agg.max_ms_behind = max(_agg.max_ms_behind, _event.value)
+                _agg.lag_ms.append(_event.value)
+                _agg.lag_times.append(
+                    _agg.log_time(
+                        _event.timestamp
+                        if _event.timestamp is not None
+                        else clock_seconds(now if now is not None else time.time())
+                    )
+                )
+            case "join":
+                _agg.joins += 1
+                _agg.online.add(_event.detail)
+            case "leave":
+                _agg.leaves += 1
+                _agg.online.discard(_event.detail)
+            case "crash":
+                _agg.crashes[_event.detail] = _agg.crashes.get(_event.detail, 0) + 1
+                ## A crash drops every connected player
+                _agg.online.clear()
+
+        return _event
+
+    def ingest_lines(self, server: str, lines) -> int:
+        """Ingest an iterable of lines, i.e. from `docker compose logs -f`."""
+        _count = 0
+        for _line in lines:
+            self.ingest_line(server, _line)
+            _count += 1
+
+        return _count
+
+    def _tail(self, server: str, log_path: Path) -> int:
+        try:
+            _stat = log_path.stat()
+        except FileNotFoundError:
+            log.debug(f"[{server}] Log file not found yet: {log_path}")
+            return 0
+
+        _offset = self.offset_store.get(log_path, _stat)
+        if _offset == _stat.st_size:
+            return 0
+
+        _count = 0
+        _now = time.time()
+        _remainder = b""
+
+        with open(log_path, "rb") as _log:
+            _log.seek(_offset)
+
+            while True:
+                _chunk = _log.read(TAIL_CHUNK_SIZE)
+                if not _chunk:
+                    break
+
+                ## _data always starts at _offset, the first unconsumed byte
+                _data = _remainder + _chunk
+                _last_nl = _data.rfind(b"\n")
+                if _last_nl == -1:
+                    _remainder = _data
+                    continue
+
+                for _line in _data[:_last_nl].split(b"\n"):
+                    self.ingest_line(server, _line.decode("utf-8", errors="replace"), _now)
+                    _count += 1
+
+                _offset += _last_nl + 1
+                _remainder = _data[_last_nl + 1 :]
+
+        ## A trailing partial line stays unconsumed until its newline is written
+        self.offset_store.set(log_path, _stat, _offset)
+
+        return _count
+
+    def poll(self) -> int:
+        """Read new lines from every registered source. Returns lines ingested."""
+        _total = 0
+        for _server, _path in self.sources.items():
+            _total += self._tail(_server, _path)
+
+        self.offset_store.save()
+
+        return _total
+
+    def run(self, interval: float = 1.0, iterations: int | None = None) -> None:
+        """Poll sources every `interval` seconds, forever or for `iterations` polls."""
+        while iterations is None or iterations > 0:
+            _lines = self.poll()
+            if _lines:
+                log.debug(f"Ingested [{_lines}] log line(s)")
+
+            if iterations is not None:
+                iterations -= 1
+            time.sleep(interval)
+
+    def stats(self, server: str) -> ServerLagStats:
+        return self._aggregates(server).summary()
+
+    def lag_stats(self) -> list[ServerLagStats]:
+        """Return per-server statistics, most lagged servers first."""
+        _stats = [_agg.summary() for _agg in self._stats.values()]
+
+        return sorted(
+            _stats, key=lambda s: (s.recent_p95_ms, s.total_ms_behind), reverse=True
+        )
+
+    def overloaded(
+        self, p95_threshold_ms: float = 2000, min_events: int = 3
+    ) -> list[ServerLagStats]:
+        """Return servers whose recent tick lag exceeds p95_threshold_ms."""
+        return [
+            s
+            for s in self.lag_stats()
+            if s.lag_events >= min_events and s.recent_p95_ms >= p95_threshold_ms
+        ]
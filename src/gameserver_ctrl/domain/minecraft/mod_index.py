@@ -0,0 +1,597 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+import re
+import tomllib
+import zipfile
+
+from gameserver_ctrl.constants import DATA_DIR
+
+from .server_gen import MCForgeServer
+
+from diskcache import Cache
+from loguru import logger as log
+from pydantic import BaseModel, Field
+
+## Directory in DATA_DIR where parsed jar metadata is cached
+mod_index_cache_dir: str = f"{DATA_DIR}/cache/mod_index"
+
+## Metadata files read from each jar, and the loader each one belongs to
+FORGE_METADATA: str = "META-INF/mods.toml"
+NEOFORGE_METADATA: str = "META-INF/neoforge.mods.toml"
+FABRIC_METADATA: str = "fabric.mod.json"
+MANIFEST: str = "META-INF/MANIFEST.MF"
+## Forge/NeoForge jar-in-jar manifest, listing the jars bundled under META-INF/jarjar
+JARJAR_METADATA: str = "META-INF/jarjar/metadata.json"
+## How many levels of jar-in-jar nesting are read
+MAX_JAR_DEPTH: int = 3
+## Bump when ModInfo changes, so cached metadata from older versions is re-read
+INDEX_FORMAT: int = 2
+
+## Dependencies provided by the server itself rather than by a mod jar
+PLATFORM_IDS: set[str] = {"minecraft", "forge", "neoforge", "fabricloader", "java"}
+
+## Loaders whose mods can run on each itzg/minecraft-server TYPE
+COMPATIBLE_LOADERS: dict[str, set[str]] = {
+    "FORGE": {"forge"},
+    "NEOFORGE": {"neoforge", "forge"},
+    "FABRIC": {"fabric"},
+    "QUILT": {"fabric"},
+}
+
+## fabric.mod.json dependency keys, and the dependency type each one means
+FABRIC_DEPENDENCY_TYPES: dict[str, str] = {
+    "depends": "required",
+    "recommends": "optional",
+    "suggests": "optional",
+    "breaks": "incompatible",
+    "conflicts": "discouraged",
+}
+
+_VERSION_PART: re.Pattern = re.compile(r"\d+|[A-Za-z]+")
+
+
+class ModDependency(BaseModel):
+    """A dependency declared by a mod.
+
+    Params:
+    -------
+
+    mod_id (str): Id of the mod depended on
+    version_range (str): Maven range (Forge) or JSON-encoded predicate (Fabric)
+    type (str): "required", "optional", "incompatible" (must not be installed
+        in range), or "discouraged" (warn if installed in range)
+    side (str): "BOTH", "CLIENT", or "SERVER". CLIENT-only dependencies are not
+        checked on servers
+    """
+
+    mod_id: str
+    version_range: str | None = Field(default=None)
+    type: str | None = Field(default="required")
+    side: str | None = Field(default="BOTH")
+
+    @property
+    def mandatory(self) -> bool:
+        return self.type == "required"
+
+
+class ModInfo(BaseModel):
+    """Metadata read from one mod jar.
+
+    Params:
+    -------
+
+    mod_id (str): Mod id, i.e. "jei"
+    version (str): Mod version, or None if the jar doesn't declare one
+    loader (str): "forge", "neoforge", or "fabric"
+    jar (str): Jar filename
+    jar_in_jar (str): Path of the bundled jar inside jar, if the mod was
+        shipped inside another mod's jar
+    side (str): "BOTH", "CLIENT", or "SERVER". Fabric mods with
+        "environment": "client" are CLIENT
+    provides (list[str]): Other mod ids this mod satisfies dependencies on
+    dependencies (list[ModDependency]): Declared dependencies
+    """
+
+    mod_id: str
+    version: str | None = Field(default=None)
+    loader: str | None = Field(default=None)
+    jar: str | None = Field(default=None)
+    jar_in_jar: str | None = Field(default=None)
+    side: str | None = Field(default="BOTH")
+    provides: list[str] | None = Field(default_factory=list)
+    dependencies: list[ModDependency] | None = Field(default_factory=list)
+
+
+class CompatibilityIssue(BaseModel):
+    """A problem found by ModIndex.check(). severity is "error" or "warning"."""
+
+    severity: str
+    mod_id: str | None = Field(default=None)
+    message: str
+
+
+class ModCompatibilityError(Exception):
+    """Raised by preflight_check() when a mods dir has blocking issues."""
+
+
+def version_key(version: str) -> tuple:
+    """Sort key for loosely-formatted versions, i.e. "1.20.1" < "1.20.10"."""
+    ## Numbers sort above words, so "1.0" > "1.0-beta"
+    return tuple(
+        (1, int(p), "") if p.isdigit() else (0, 0, p.lower())
+        for p in _VERSION_PART.findall(version.split("+")[0])
+    )
+
+
+def compare_versions(a: str, b: str) -> int:
+    _a, _b = version_key(a), version_key(b)
+    _pad = max(len(_a), len(_b))
+    _a += ((1, 0, ""),) * (_pad - len(_a))
+    _b += ((1, 0, ""),) * (_pad - len(_b))
+
+    return (_a > _b) - (_a < _b)
+
+
+def in_maven_range(version: str, version_range: str) -> bool:
+    """Check version against a Maven range, i.e. "[1.20,1.21)" or "[47,)".
+
+    A bare version (no brackets) is a minimum, as Forge treats it. Several
+    ranges separated by commas match if any of them match.
+    """
+    _range = version_range.strip()
+    if not _range or _range == "*":
+        return True
+    if _range[0] not in "[(":
+        return compare_versions(version, _range) >= 0
+
+    for _lo_inc, _lo, _comma, _hi, _hi_inc in re.findall(
+        r"([\[(])([^,\])]*)(,?)([^,\])]*)([\])])", _range
+    ):
+        _lo, _hi = _lo.strip(), _hi.strip()
+
+        ## "[1.20]" (no comma) pins an exact version
+        if not _comma:
+            if compare_versions(version, _lo) == 0:
+                return True
+            continue
+
+        if _lo:
+            _cmp = compare_versions(version, _lo)
+            if _cmp < 0 or (_cmp == 0 and _lo_inc == "("):
+                continue
+        if _hi:
+            _cmp = compare_versions(version, _hi)
+            if _cmp > 0 or (_cmp == 0 and _hi_inc == ")"):
+                continue
+
+        return True
+
+    return False
+
+
+def _fabric_predicate(version: str, predicate: str) -> bool:
+    predicate = predicate.strip()
+    if predicate in ("", "*"):
+        return True
+
+    for _op in (">=", "<=", ">", "<", "=", "~", "^"):
+        if predicate.startswith(_op):
+            _target = predicate[len(_op) :].strip()
+            break
+    else:
+        _op, _target = "=", predicate
+
+    if ".x" in _target or _target.endswith(".*"):
+        _prefix = re.split(r"\.[x*]", _target)[0]
+        return version == _prefix or version.startswith(f"{_prefix}.")
+
+    _cmp = compare_versions(version, _target)
+    _parts = _target.split(".")
+
+    match _op:
+        case ">=":
+            return _cmp >= 0
+        case "<=":
+            return _cmp <= 0
+        case ">":
+            return _cmp > 0
+        case "<":
+            return _cmp < 0
+        case "~":
+            ## Same major.minor, at least the target
+            return _cmp >= 0 and version.split(".")[:2] == _parts[:2]
+        case "^":
+            ## Same major, at least the target
+            return _cmp >= 0 and version.split(".")[:1] == _parts[:1]
+        case _:
+            return _cmp == 0
+
+
+def in_fabric_range(version: str, version_range: str | list[str]) -> bool:
+    """Check version against a fabric.mod.json predicate or list of predicates.
+
+    A list matches if any entry matches. Space-separated predicates in one
+    entry must all match.
+    """
+    _ranges = version_range if isinstance(version_range, list) else [version_range]
+
+    return any(
+        all(_fabric_predicate(version, p) for p in _range.split()) for _range in _ranges
+    )
+
+
+def version_in_range(version: str, version_range: str | None, loader: str | None) -> bool:
+    if not version_range:
+        return True
+    if loader == "fabric":
+        return in_fabric_range(version, json.loads(version_range))
+
+    return in_maven_range(version, version_range)
+
+
+def _manifest_version(jar: zipfile.ZipFile) -> str | None:
+    try:
+        _manifest = jar.read(MANIFEST).decode("utf-8", errors="replace")
+    except KeyError:
+        return None
+
+    for _line in _manifest.splitlines():
+        if _line.startswith("Implementation-Version:"):
+            return _line.split(":", 1)[1].strip()
+
+    return None
+
+
+def _mods_toml_dependency_type(dep: dict) -> str:
+    ## Older mods.toml use `mandatory`, newer (NeoForge) use `type`
+    if "type" in dep:
+        return str(dep["type"]).lower()
+
+    return "required" if dep.get("mandatory", True) else "optional"
+
+
+def _parse_mods_toml(jar: zipfile.ZipFile, member: str, loader: str) -> list[ModInfo]:
+    _data = tomllib.loads(jar.read(member).decode("utf-8", errors="replace"))
+    _dependencies = _data.get("dependencies", {})
+    _mods: list[ModInfo] = []
+
+    for _mod in _data.get("mods", []):
+        _version = str(_mod.get("version", "")) or None
+        if _version and "${" in _version:
+            _version = _manifest_version(jar)
+
+        _deps = _dependencies.get(_mod["modId"], [])
+        _mods.append(
+            ModInfo(
+                mod_id=_mod["modId"],
+                version=_version,
+                loader=loader,
+                dependencies=[
+                    ModDependency(
+                        mod_id=_dep["modId"],
+                        version_range=_dep.get("versionRange"),
+                        type=_mods_toml_dependency_type(_dep),
+                        side=str(_dep.get("side", "BOTH")).upper(),
+                    )
+                    for _dep in _deps
+                    if "modId" in _dep
+                ],
+            )
+        )
+
+    return _mods
+
+
+def _parse_fabric_json(jar: zipfile.ZipFile) -> list[ModInfo]:
+    ## strict=False tolerates the raw control characters some mods ship
+    _data = json.loads(jar.read(FABRIC_METADATA).decode("utf-8"), strict=False)
+
+    return [
+        ModInfo(
+            mod_id=_data["id"],
+            version=_data.get("version"),
+            loader="fabric",
+            side="CLIENT" if _data.get("environment") == "client" else "BOTH",
+            provides=list(_data.get("provides", [])),
+            dependencies=[
+                ## Stored as JSON so string and list predicates round-trip
+                ModDependency(
+                    mod_id=_id, version_range=json.dumps(_range), type=_type
+                )
+                for _key, _type in FABRIC_DEPENDENCY_TYPES.items()
+                for _id, _range in _data.get(_key, {}).items()
+            ],
+        )
+    ]
+
+
+def _bundled_jars(jar: zipfile.ZipFile, names: set[str]) -> list[str]:
+    """Return the paths of jars bundled inside jar (jar-in-jar)."""
+    _paths: list[str] = []
+
+    if FABRIC_METADATA in names:
+        _data = json.loads(jar.read(FABRIC_METADATA).decode("utf-8"), strict=False)
+        _paths += [_entry["file"] for _entry in _data.get("jars", []) if "file" in _entry]
+
+    if JARJAR_METADATA in names:
+        _data = json.loads(jar.read(JARJAR_METADATA).decode("utf-8"))
+        _paths += [_entry["path"] for _entry in _data.get("jars", []) if "path" in _entry]
+
+    return [_path for _path in _paths if _path in names]
+
+
+def _read_zip_metadata(jar: zipfile.ZipFile, depth: int = 0) -> list[ModInfo]:
+    _names = set(jar.namelist())
+
+    if NEOFORGE_METADATA in _names:
+        _mods = _parse_mods_toml(jar, NEOFORGE_METADATA, "neoforge")
+    elif FORGE_METADATA in _names:
+        _mods = _parse_mods_toml(jar, FORGE_METADATA, "forge")
+    elif FABRIC_METADATA in _names:
+        _mods = _parse_fabric_json(jar)
+    else:
+        _mods = []
+
+    if depth < MAX_JAR_DEPTH:
+        for _path in _bundled_jars(jar, _names):
+            with zipfile.ZipFile(io.BytesIO(jar.read(_path))) as _bundled:
+                for _mod in _read_zip_metadata(_bundled, depth + 1):
+                    _mod.jar_in_jar = _mod.jar_in_jar or _path
+                    _mods.append(_mod)
+
+    return _mods
+
+
+def read_jar_metadata(jar_path: str | Path) -> list[ModInfo]:
+    """Read mod metadata from a jar without extracting it.
+
+    Only the zip central directory and the metadata members are read, plus
+    any bundled jar-in-jar jars (Fabric `jars`, Forge META-INF/jarjar), whose
+    mods are returned with jar_in_jar set. A jar can declare several mods;
+    jars with no known metadata return [].
+    """
+    with zipfile.ZipFile(jar_path) as _jar:
+        _mods = _read_zip_metadata(_jar)
+
+    for _mod in _mods:
+        _mod.jar = Path(jar_path).name
+
+    return _mods
+
+
+def hash_file(path: str | Path) -> str:
+    _hash = hashlib.sha256()
+    with open(path, "rb") as _file:
+        while _chunk := _file.read(1024 * 1024):
+            _hash.update(_chunk)
+
+    return _hash.hexdigest()
+
+
+class ModIndex:
+    """Index of the mods in a mods directory, for pre-flight compatibility checks.
+
+    Parsed metadata is cached by jar sha256, and each jar's hash is cached by
+    (path, size, mtime), so a warm scan only stats the jars.
+
+    Params:
+    -------
+
+    cache_dir (str): Directory for the metadata cache
+    """
+
+    def __init__(self, cache_dir: str = mod_index_cache_dir) -> None:
+        """Open the metadata cache. Call scan() to index a mods dir."""
+        self.cache: Cache = Cache(directory=str(cache_dir))
+        ## Mods installed as their own jar in the mods dir
+        self.mods: dict[str, list[ModInfo]] = {}
+        ## Every mod id a dependency can be satisfied by: installed mods,
+        #  jar-in-jar mods, and ids listed in `provides`
+        self.available: dict[str, list[ModInfo]] = {}
+
+    def __enter__(self) -> ModIndex:
+        """Return the index, closing its cache when the with block exits."""
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Close the metadata cache."""
+        self.close()
+
+    def close(self) -> None:
+        self.cache.close()
+
+    def _jar_mods(self, jar_path: Path) -> list[ModInfo]:
+        _stat = jar_path.stat()
+        _stat_key = f"stat:{jar_path.resolve()}:{_stat.st_size}:{_stat.st_mtime_ns}"
+
+        _hash = self.cache.get(_stat_key)
+        if _hash is None:
+            _hash = hash_file(jar_path)
+            self.cache.set(_stat_key, _hash)
+
+        _cached = self.cache.get(f"mod:v{INDEX_FORMAT}:{_hash}")
+        if _cached is not None:
+            return [ModInfo.model_validate(m) for m in _cached]
+
+        try:
+            _mods = read_jar_metadata(jar_path)
+        except (zipfile.BadZipFile, KeyError, ValueError, tomllib.TOMLDecodeError) as exc:
+            log.warning(f"Could not read mod metadata from [{jar_path.name}]. Details: {exc}")
+            _mods = []
+
+        self.cache.set(f"mod:v{INDEX_FORMAT}:{_hash}", [m.model_dump() for m in _mods])
+
+        return _mods
+
+    def scan(self, mods_dir: str | Path) -> dict[str, list[ModInfo]]:
+        """Index every .jar in mods_dir. Returns {mod id: [ModInfo, ...]}."""
+        self.mods = {}
+        self.available = {}
+
+        with os.scandir(mods_dir) as _entries:
+            _jars = sorted(
+                (e for e in _entries if e.is_file() and e.name.endswith(".jar")),
+                key=lambda e: e.name,
+            )
+
+        for _entry in _jars:
+            for _mod in self._jar_mods(Path(_entry.path)):
+                if not _mod.jar_in_jar:
+                    self.mods.setdefault(_mod.mod_id, []).append(_mod)
+
+                for _id in [_mod.mod_id, *_mod.provides]:
+                    self.available.setdefault(_id, []).append(_mod)
+
+        log.debug(f"Indexed [{len(self.mods)}] mod(s) in {mods_dir}")
+
+        return self.mods
+
+    def check(
+        self, server_type: str | None = None, server_ver: str | None = None
+    ) -> list[CompatibilityIssue]:
+        """Check the indexed mods against each other and the server.
+
+        Reports duplicate mod ids, mods for the wrong loader, missing mandatory
+        dependencies, dependency version mismatches, installed incompatible
+        mods, and mods that don't support server_ver. server_ver values like
+        "LATEST" skip the Minecraft check.
+
+        Dependencies are checked only for mods that load on a server: CLIENT
+        side dependencies & client-only mods are skipped, as are jar-in-jar
+        mods, whose dependencies ship with the jar that bundles them.
+        """
+        _issues: list[CompatibilityIssue] = []
+        _loaders = COMPATIBLE_LOADERS.get((server_type or "").upper())
+        _mc_version = server_ver if server_ver and server_ver[0].isdigit() else None
+
+        for _mod_id, _mods in sorted(self.mods.items()):
+            if len(_mods) > 1:
+                _jars = ", ".join(f"{m.jar} ({m.version})" for m in _mods)
+                _issues.append(
+                    CompatibilityIssue(
+                        severity="error",
+                        mod_id=_mod_id,
+                        message=f"Installed more than once: {_jars}",
+                    )
+                )
+
+            for _mod in _mods:
+                if _loaders and _mod.loader not in _loaders:
+                    _issues.append(
+                        CompatibilityIssue(
+                            severity="error",
+                            mod_id=_mod_id,
+                            message=f"{_mod.jar} is a {_mod.loader} mod, server type is {server_type}",
+                        )
+                    )
+
+                ## Client-only mods aren't loaded on a dedicated server
+                if _mod.side == "CLIENT":
+                    continue
+
+                for _dep in _mod.dependencies:
+                    if _dep.side == "CLIENT":
+                        continue
+
+                    _issue = self._check_dependency(_mod, _dep, _mc_version)
+                    if _issue:
+                        _issues.append(_issue)
+
+        return _issues
+
+    def _check_dependency(
+        self, mod: ModInfo, dep: ModDependency, mc_version: str | None
+    ) -> CompatibilityIssue | None:
+        if dep.mod_id == "minecraft":
+            if dep.type not in ("required", "optional"):
+                return None
+            if mc_version and not version_in_range(
+                mc_version, dep.version_range, mod.loader
+            ):
+                return CompatibilityIssue(
+                    severity="error",
+                    mod_id=mod.mod_id,
+                    message=f"Requires Minecraft {dep.version_range}, server is {mc_version}",
+                )
+            return None
+
+        if dep.mod_id in PLATFORM_IDS:
+            return None
+
+        _installed = self.available.get(dep.mod_id)
+        if not _installed:
+            if not dep.mandatory:
+                return None
+
+            return CompatibilityIssue(
+                severity="error",
+                mod_id=mod.mod_id,
+                message=f"Missing required dependency: {dep.mod_id} {dep.version_range or ''}".strip(),
+            )
+
+        ## Loaders pick the newest copy when several jars provide a mod id
+        _version = max(
+            (m.version for m in _installed if m.version),
+            key=version_key,
+            default=None,
+        )
+
+        if dep.type in ("incompatible", "discouraged"):
+            if _version and not version_in_range(_version, dep.version_range, mod.loader):
+                return None
+
+            return CompatibilityIssue(
+                severity="error" if dep.type == "incompatible" else "warning",
+                mod_id=mod.mod_id,
+                message=f"Is {dep.type} with installed {dep.mod_id} {_version or ''}".strip(),
+            )
+
+        if _version and not version_in_range(_version, dep.version_range, mod.loader):
+            return CompatibilityIssue(
+                severity="error" if dep.mandatory else "warning",
+                mod_id=mod.mod_id,
+                message=f"Requires {dep.mod_id} {dep.version_range}, found {_version}",
+            )
+
+        return None
+
+
+def preflight_check(
+    server: MCForgeServer,
+    mods_dir: str | Path,
+    index: ModIndex | None = None,
+    raise_on_error: bool = True,
+) -> list[CompatibilityIssue]:
+    """Check a mods dir against a server's server_type/server_ver before generating it.
+
+    Raises ModCompatibilityError if any error-level issues are found and
+    raise_on_error is True.
+    """
+    _env_data = server.env_file.env_data if server.env_file else None
+    _server_type = _env_data.server_type if _env_data else None
+    _server_ver = _env_data.server_ver if _env_data else None
+
+    _index = index or ModIndex()
+    try:
+        _index.scan(mods_dir)
+        _issues = _index.check(server_type=_server_type, server_ver=_server_ver)
+    finally:
+        if index is None:
+            _index.close()
+
+    for _issue in _issues:
+        _log = log.error if _issue.severity == "error" else log.warning
+        _log(f"[{server.name}] {_issue.mod_id}: {_issue.message}")
+
+    _errors = [i for i in _issues if i.severity == "error"]
+    if _errors and raise_on_error:
+        raise ModCompatibilityError(
+            f"[{server.name}] {len(_errors)} mod compatibility error(s) in {mods_dir}"
+        )
+
+    return _issues
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+from .placement import FleetHost, PlacementPlan, plan_placement
+from .schemas import ForgeServerEnvData
+from .server_gen import MCForgeServer
+
+from loguru import logger as log
+from pydantic import BaseModel, Field
+
+## Container memory needed per MB of heap (metaspace, threads, native buffers)
+JVM_OVERHEAD_FACTOR: float = 1.25
+## Heap sizes are rounded down to a multiple of this many MB
+HEAP_STEP_MB: int = 256
+## Heaps at or above this size use Aikar's large-heap G1 settings
+LARGE_HEAP_MB: int = 12 * 1024
+
+## Aikar's G1 flags, https://docs.papermc.io/paper/aikars-flags
+AIKAR_FLAGS: list[str] = [
+    "-XX:+UseG1GC",
+    "-XX:+ParallelRefProcEnabled",
+    "-XX:MaxGCPauseMillis=200",
+    "-XX:+UnlockExperimentalVMOptions",
+    "-XX:+DisableExplicitGC",
+    "-XX:+AlwaysPreTouch",
+    "-XX:G1HeapWastePercent=5",
+    "-XX:G1MixedGCCountTarget=4",
+    "-XX:G1MixedGCLiveThresholdPercent=90",
+    "-XX:G1RSetUpdatingPauseTimePercent=5",
+    "-XX:SurvivorRatio=32",
+    "-XX:+PerfDisableSharedMem",
+    "-XX:MaxTenuringThreshold=1",
+]
+AIKAR_SMALL_HEAP_FLAGS: list[str] = [
+    "-XX:G1NewSizePercent=30",
+    "-XX:G1MaxNewSizePercent=40",
+    "-XX:G1HeapRegionSize=8M",
+    "-XX:G1ReservePercent=20",
+    "-XX:InitiatingHeapOccupancyPercent=15",
+]
+AIKAR_LARGE_HEAP_FLAGS: list[str] = [
+    "-XX:G1NewSizePercent=40",
+    "-XX:G1MaxNewSizePercent=50",
+    "-XX:G1HeapRegionSize=16M",
+    "-XX:G1ReservePercent=15",
+    "-XX:InitiatingHeapOccupancyPercent=20",
+]
+
+
+class InsufficientMemoryError(Exception):
+    """Raised when a server's memory budget is below its profile's minimum heap."""
+
+
+class PerformanceProfile(BaseModel):
+    """Rules for sizing a server's JVM & view distances.
+
+    Params:
+    -------
+
+    name (str): Profile name
+    base_heap_mb (int): Heap for an empty server with no mods
+    heap_per_mod_mb (int): Heap added per installed mod
+    heap_per_player_mb (int): Heap added per expected player
+    min_heap_mb (int): Never give a server less heap than this
+    max_heap_mb (int): Never give a server more heap than this
+    view_distance (int): View distance when the server gets all the heap it wants
+    simulation_distance (int): Simulation distance when it gets all the heap it wants
+    min_view_distance (int): Lowest view distance to scale down to
+    min_simulation_distance (int): Lowest simulation distance to scale down to
+    players_per_distance_step (int): Drop distances by 1 for each this many
+        expected players
+    """
+
+    name: str
+    base_heap_mb: int | None = Field(default=1024)
+    heap_per_mod_mb: int | None = Field(default=0)
+    heap_per_player_mb: int | None = Field(default=32)
+    min_heap_mb: int | None = Field(default=1024)
+    max_heap_mb: int | None = Field(default=4096)
+    view_distance: int | None = Field(default=10)
+    simulation_distance: int | None = Field(default=10)
+    min_view_distance: int | None = Field(default=6)
+    min_simulation_distance: int | None = Field(default=4)
+    players_per_distance_step: int | None = Field(default=0)
+
+    def wanted_heap_mb(self, mod_count: int = 0, player_count: int = 0) -> int:
+        _want = (
+            self.base_heap_mb
+            + mod_count * self.heap_per_mod_mb
+            + player_count * self.heap_per_player_mb
+        )
+
+        return min(max(_want, self.min_heap_mb), self.max_heap_mb)
+
+
+PROFILES: dict[str, PerformanceProfile] = {
+    _profile.name: _profile
+    for _profile in [
+        PerformanceProfile(
+            name="small-vanilla",
+            base_heap_mb=1536,
+            heap_per_mod_mb=16,
+            heap_per_player_mb=64,
+            min_heap_mb=1024,
+            max_heap_mb=4096,
+            view_distance=10,
+            simulation_distance=8,
+        ),
+        PerformanceProfile(
+            name="heavy-modpack",
+            base_heap_mb=4096,
+            heap_per_mod_mb=24,
+            heap_per_player_mb=128,
+            min_heap_mb=4096,
+            max_heap_mb=16384,
+            view_distance=8,
+            simulation_distance=6,
+            min_view_distance=5,
+            min_simulation_distance=4,
+        ),
+        PerformanceProfile(
+            name="event",
+            base_heap_mb=3072,
+            heap_per_mod_mb=16,
+            heap_per_player_mb=96,
+            min_heap_mb=2048,
+            max_heap_mb=12288,
+            view_distance=8,
+            simulation_distance=5,
+            min_view_distance=4,
+            min_simulation_distance=3,
+            players_per_distance_step=25,
+        ),
+    ]
+}
+
+DEFAULT_PROFILE: str = "small-vanilla"
+
+
+class PerformanceSettings(BaseModel):
+    """Computed JVM & server.properties values for one server.
+
+    Params:
+    -------
+
+    heap_mb (int): JVM heap size in MB
+    jvm_xx_opts (str): Space-separated -XX flags
+    view_distance (int): server.properties view-distance
+    simulation_distance (int): server.properties simulation-distance
+    """
+
+    heap_mb: int
+    jvm_xx_opts: str | None = Field(default=None)
+    view_distance: int | None = Field(default=None)
+    simulation_distance: int | None = Field(default=None)
+
+    @property
+    def memory(self) -> str:
+        return f"{self.heap_mb}M"
+
+    @property
+    def container_memory_mb(self) -> int:
+        return int(self.heap_mb * JVM_OVERHEAD_FACTOR)
+
+
+def get_profile(name: str | None) -> PerformanceProfile:
+    _name = name or DEFAULT_PROFILE
+    if _name not in PROFILES:
+        raise ValueError(
+            f"Unknown performance profile: {_name}. Options: {', '.join(PROFILES)}"
+        )
+
+    return PROFILES[_name]
+
+
+def gc_flags(heap_mb: int) -> str:
+    """Return Aikar's G1 flags for a heap of heap_mb."""
+    _sized = AIKAR_LARGE_HEAP_FLAGS if heap_mb >= LARGE_HEAP_MB else AIKAR_SMALL_HEAP_FLAGS
+
+    return " ".join(AIKAR_FLAGS + _sized)
+
+
+def compute_settings(
+    profile: PerformanceProfile,
+    mod_count: int = 0,
+    player_count: int = 0,
+    memory_budget_mb: int | None = None,
+) -> PerformanceSettings:
+    """Size a server's heap, GC flags & distances from its profile and load.
+
+    Params:
+    -------
+
+    profile (PerformanceProfile): Profile to size the server with
+    mod_count (int): Installed mods
+    player_count (int): Expected concurrent players
+    memory_budget_mb (int): Container memory this server may use on its host.
+        If the heap the profile wants doesn't fit, the heap is shrunk and view &
+        simulation distances are scaled down by the same ratio. Raises
+        InsufficientMemoryError if the budget can't fit the profile's min_heap_mb
+    """
+    _want = profile.wanted_heap_mb(mod_count, player_count)
+    _fit = _want
+
+    if memory_budget_mb is not None:
+        _fit = min(_want, int(memory_budget_mb / JVM_OVERHEAD_FACTOR))
+
+    _min_heap = max(profile.min_heap_mb, HEAP_STEP_MB)
+    if _fit < _min_heap:
+        raise InsufficientMemoryError(
+            f"[{profile.name}] Memory budget of {memory_budget_mb}MB only fits a {_fit}M heap, below the profile minimum of {_min_heap}M"
+        )
+
+    _heap = max(_fit // HEAP_STEP_MB * HEAP_STEP_MB, _min_heap)
+
+    ## Scale distances by how much of its wanted heap the budget left the
+    #  server, not by the rounding above
+    _ratio = _fit / _want
+    _player_steps = (
+        player_count // profile.players_per_distance_step
+        if profile.players_per_distance_step
+        else 0
+    )
+
+    _view = max(
+        round(profile.view_distance * _ratio) - _player_steps,
+        profile.min_view_distance,
+    )
+    _simulation = max(
+        round(profile.simulation_distance * _ratio) - _player_steps,
+        profile.min_simulation_distance,
+    )
+
+    return PerformanceSettings(
+        heap_mb=_heap,
+        jvm_xx_opts=gc_flags(_heap),
+        view_distance=_view,
+        ## Simulating chunks players can't see is wasted tick time
+        simulation_distance=min(_simulation, _view),
+    )
+
+
+def apply_settings(
+    env_data: ForgeServerEnvData, settings: PerformanceSettings
+) -> ForgeServerEnvData:
+    """Return a copy of env_data with the computed settings filled in."""
+    return env_data.model_copy(
+        update={
+            "memory": settings.memory,
+            "jvm_xx_opts": settings.jvm_xx_opts,
+            "view_distance": settings.view_distance,
+            "simulation_distance": settings.simulation_distance,
+        }
+    )
+
+
+def split_host_memory(
+    host: FleetHost, servers: list[MCForgeServer]
+) -> dict[str, int | None]:
+    """Split a host's usable memory between its servers.
+
+    Each server's share is proportional to the container memory its profile
+    wants, and never more than that. Returns {server name: budget MB}, with
+    None budgets if the host's memory_mb is not set.
+    """
+    if host.memory_mb is None:
+        return {s.name: None for s in servers}
+
+    _usable = max(host.memory_mb - host.reserved_memory_mb, 0)
+    _wants = {
+        s.name: get_profile(s.performance_profile).wanted_heap_mb(
+            s.mod_count, s.player_count
+        )
+        * JVM_OVERHEAD_FACTOR
+        for s in servers
+    }
+    _total_want = sum(_wants.values())
+
+    if _total_want <= _usable:
+        return {_name: int(_want) for _name, _want in _wants.items()}
+
+    log.warning(
+        f"[{host.name}] Servers want {int(_total_want)}MB but only {_usable}MB is available, scaling down"
+    )
+
+    return {
+        _name: int(_usable * _want / _total_want) for _name, _want in _wants.items()
+    }
+
+
+def apply_profiles(
+    servers: list[MCForgeServer],
+    hosts: list[FleetHost] | None = None,
+    plan: PlacementPlan | None = None,
+) -> list[MCForgeServer]:
+    """Return copies of servers with performance settings rendered into their env data.
+
+    Each server is sized from its performance_profile (DEFAULT_PROFILE if not
+    set), mod count and expected players. If hosts are given, each host's
+    memory is split between the servers placed on it (see plan_placement()).
+    Raises InsufficientMemoryError if a host can't give one of its servers
+    the profile's minimum heap, instead of rendering a heap it can't boot with.
+    """
+    _budgets: dict[str, int | None] = {}
+
+    if hosts:
+        plan = plan or plan_placement(servers, hosts)
+        _by_name = {s.name: s for s in servers}
+        for _host in hosts:
+            _budgets.update(
+                split_host_memory(
+                    _host, [_by_name[n] for n in plan.servers_on(_host.name)]
+                )
+            )
+
+    _updated: list[MCForgeServer] = []
+    for _server in servers:
+        try:
+            _settings = compute_settings(
+                get_profile(_server.performance_profile),
+                mod_count=_server.mod_count,
+                player_count=_server.player_count,
+                memory_budget_mb=_budgets.get(_server.name),
+            )
+        except InsufficientMemoryError as exc:
+            _host = plan.assignments.get(_server.name) if plan else None
+            msg = InsufficientMemoryError(
+                f"[{_server.name}] Not enough memory on host [{_host}]. Details: {exc}"
+            )
+            log.error(msg)
+
+            raise msg from exc
+        log.debug(f"[{_server.name}] Performance settings: {_settings}")
+
+        _server = _server.model_copy(deep=True)
+        if _server.env_file:
+            _server.env_file.env_data = apply_settings(
+                _server.env_file.env_data or ForgeServerEnvData(), _settings
+            )
+        _updated.append(_server)
+
+    return _updated
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import math
+import os
+
+from gameserver_ctrl.constants import OUTPUT_DIR
+
+from .server_gen import MCForgeServer, create_servers
+
+from loguru import logger as log
+from pydantic import BaseModel, Field
+
+## Root directory per-host output trees are generated under
+hosts_output_dir: str = f"{OUTPUT_DIR}/hosts"
+
+
+class FleetHost(BaseModel):
+    """A machine that runs generated servers.
+
+    Params:
+    -------
+
+    name (str): Unique host name, i.e. a hostname
+    capacity (float): Relative capacity. A host with capacity 2 is expected to
+        carry twice the server cost of a host with capacity 1
+    output_path (str): Directory this host's server tree is generated in.
+        Defaults to output/hosts/<name>/minecraft
+    memory_mb (int): Total host memory, split between the servers placed on it
+        by performance.apply_profiles()
+    reserved_memory_mb (int): Memory kept back for the OS & other processes
+    """
+
+    name: str
+    capacity: float | None = Field(default=1.0, gt=0)
+    output_path: str | None = Field(default=None)
+    memory_mb: int | None = Field(default=None)
+    reserved_memory_mb: int | None = Field(default=2048)
+
+    @property
+    def output_dir(self) -> str:
+        if self.output_path:
+            return self.output_path.rstrip("/")
+
+        return f"{hosts_output_dir}/{self.name}/minecraft"
+
+
+class ServerCostModel(BaseModel):
+    """Weights used to estimate how much host capacity a server uses.
+
+    Params:
+    -------
+
+    base (float): Cost of any server, regardless of mods or players
+    per_mod (float): Added cost for each installed mod
+    per_player (float): Added cost for each expected player
+    """
+
+    base: float | None = Field(default=1.0)
+    per_mod: float | None = Field(default=0.05)
+    per_player: float | None = Field(default=0.02)
+
+
+def estimate_server_cost(
+    server: MCForgeServer, cost_model: ServerCostModel | None = None
+) -> float:
+    """Estimate a server's load from its mod count and expected player count."""
+    cost_model = cost_model or ServerCostModel()
+
+    return (
+        cost_model.base
+        + server.mod_count * cost_model.per_mod
+        + server.player_count * cost_model.per_player
+    )
+
+
+def _hash_unit(key: str) -> float:
+    """Hash key to a float in the open interval (0, 1), stable across runs."""
+    _digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+
+    return (int.from_bytes(_digest, "big") + 1) / (2**64 + 2)
+
+
+def host_scores(server_name: str, hosts: list[FleetHost]) -> list[FleetHost]:
+    """Rank hosts for a server with weighted rendezvous hashing, best first.
+
+    Each (host, server) pair gets the score -capacity / ln(hash), which picks each
+    host with probability proportional to its capacity. Adding or removing a
+    host only moves the servers that rank that host first.
+    """
+    return sorted(
+        hosts,
+        key=lambda h: -h.capacity / math.log(_hash_unit(f"{h.name}:{server_name}")),
+        reverse=True,
+    )
+
+
+class PlacementPlan(BaseModel):
+    """The result of assigning servers to hosts.
+
+    Params:
+    -------
+
+    assignments (dict[str, str]): Server name -> host name
+    host_loads (dict[str, float]): Host name -> total estimated cost placed on it
+    """
+
+    assignments: dict[str, str] | None = Field(default_factory=dict)
+    host_loads: dict[str, float] | None = Field(default_factory=dict)
+
+    def servers_on(self, host: str) -> list[str]:
+        return [s for s, h in self.assignments.items() if h == host]
+
+    def moved_from(self, previous: PlacementPlan) -> dict[str, tuple[str, str]]:
+        """Return {server: (old host, new host)} for servers that changed host."""
+        return {
+            _server: (previous.assignments[_server], _host)
+            for _server, _host in self.assignments.items()
+            if _server in previous.assignments
+            and previous.assignments[_server] != _host
+        }
+
+
+def plan_placement(
+    servers: list[MCForgeServer],
+    hosts: list[FleetHost],
+    cost_model: ServerCostModel | None = None,
+    load_factor: float = 1.25,
+) -> PlacementPlan:
+    """Assign servers to hosts using consistent hashing with bounded loads.
+
+    Every server walks its rendezvous ranking of hosts and lands on the first
+    one with room left. A host's room is its capacity share of the fleet's
+    total cost, times load_factor. Servers with `host` set are pinned to that
+    host. Servers are placed in name order, so the same inputs always give
+    the same plan.
+
+    Params:
+    -------
+
+    servers (list[MCForgeServer]): Servers to place. Names must be unique
+    hosts (list[FleetHost]): Hosts to place them on
+    cost_model (ServerCostModel): Weights for estimate_server_cost()
+    load_factor (float): How far over its fair share a host may be loaded
+        before servers spill to their next-ranked host. Lower is more even,
+        higher moves fewer servers when the fleet changes
+    """
+    if not hosts:
+        raise ValueError("Cannot plan placement with no hosts")
+
+    _names = [s.name for s in servers]
+    if len(set(_names)) != len(_names):
+        raise ValueError("Server names must be unique to plan placement")
+
+    _hosts = {h.name: h for h in hosts}
+    _costs = {s.name: estimate_server_cost(s, cost_model) for s in servers}
+    _total_cost = sum(_costs.values())
+    _total_capacity = sum(h.capacity for h in hosts)
+    _max_cost = max(_costs.values(), default=0.0)
+
+    ## A host can always take at least one of the largest servers
+    _bounds = {
+        h.name: max(load_factor * _total_cost * h.capacity / _total_capacity, _max_cost)
+        for h in hosts
+    }
+
+    plan = PlacementPlan(host_loads={h.name: 0.0 for h in hosts})
+
+    for _server in sorted(servers, key=lambda s: s.name):
+        _cost = _costs[_server.name]
+
+        if _server.host:
+            if _server.host not in _hosts:
+                raise ValueError(
+                    f"Server [{_server.name}] is pinned to unknown host: {_server.host}"
+                )
+            _chosen = _server.host
+        else:
+            _ranked = host_scores(_server.name, hosts)
+            _chosen = next(
+                (
+                    h.name
+                    for h in _ranked
+                    if plan.host_loads[h.name] + _cost <= _bounds[h.name]
+                ),
+                ## Every host is full (only possible with pins), use the least loaded
+                min(_ranked, key=lambda h: plan.host_loads[h.name] / h.capacity).name,
+            )
+
+        plan.assignments[_server.name] = _chosen
+        plan.host_loads[_chosen] += _cost
+
+    log.debug(f"Placed [{len(servers)}] server(s) on [{len(hosts)}] host(s)")
+
+    return plan
+
+
+def _generate_host(host: FleetHost, servers: list[MCForgeServer]) -> list[str]:
+    """Generate one host's tree. Runs in a worker process of generate_host_trees()."""
+    create_servers(servers)
+    _created: list[str] = [_server.output_dir for _server in servers]
+
+    log.info(f"[{host.name}] Generated [{len(_created)}] server(s) in {host.output_dir}")
+
+    return _created
+
+
+def generate_host_trees(
+    servers: list[MCForgeServer],
+    hosts: list[FleetHost],
+    plan: PlacementPlan | None = None,
+    max_workers: int | None = None,
+) -> dict[str, list[str]]:
+    """Generate one output tree per host, hosts in parallel.
+
+    Each host is generated in its own worker process. Rendering templates is
+    CPU bound and holds the GIL, so threads would render one host at a time.
+    max_workers defaults to one process per host, up to the CPU count.
+
+    Each server is copied with its host and output_path set from the plan, so
+    the passed-in servers are left untouched. Returns {host name: [server dirs]}.
+    """
+    plan = plan or plan_placement(servers, hosts)
+    _hosts = {h.name: h for h in hosts}
+
+    _per_host: dict[str, list[MCForgeServer]] = {h.name: [] for h in hosts}
+    for _server in servers:
+        _host = _hosts[plan.assignments[_server.name]]
+        _per_host[_host.name].append(
+            _server.model_copy(
+                deep=True, update={"host": _host.name, "output_path": _host.output_dir}
+            )
+        )
+
+    _jobs = {_name: _servers for _name, _servers in _per_host.items() if _servers}
+    if not _jobs:
+        return {}
+
+    _workers = max_workers or min(len(_jobs), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=_workers) as _pool:
+        _futures = {
+            _name: _pool.submit(_generate_host, _hosts[_name], _servers)
+            for _name, _servers in _jobs.items()
+        }
+
+        return {_name: _future.result() for _name, _future in _futures.items()}
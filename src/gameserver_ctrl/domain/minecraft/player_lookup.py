@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import time
+from uuid import UUID
+
+from gameserver_ctrl.constants import DATA_DIR
+
+from .schemas import WhitelistPlayer
+
+from diskcache import Cache
+import httpx
+from loguru import logger as log
+
+## Mojang's bulk username -> profile endpoint. Accepts a JSON list of names
+#  and returns [{"id": <uuid-hex>, "name": <username>}, ...] for names that exist.
+MOJANG_API_URL: str = "https://api.mojang.com"
+MOJANG_BULK_LOOKUP_PATH: str = "/profiles/minecraft"
+## Maximum number of names Mojang accepts per bulk lookup request
+MOJANG_BULK_LOOKUP_LIMIT: int = 10
+
+## Directory in DATA_DIR where resolved profiles are cached
+player_cache_dir: str = f"{DATA_DIR}/cache/mojang_profiles"
+
+## Usernames can change (at most once every 30 days), so cached ids expire
+PROFILE_CACHE_TTL: int = 7 * 24 * 60 * 60
+## Names that don't resolve are cached for less time, in case they get registered
+MISSING_PROFILE_CACHE_TTL: int = 60 * 60
+
+## Cached value for names Mojang returned no profile for
+_MISSING: str = ""
+
+
+class PlayerLookupError(Exception):
+    """Raised when the Mojang lookup endpoint can't be queried."""
+
+
+def format_uuid(player_id: str) -> str:
+    """Convert an undashed Mojang uuid-hex string into a dashed UUID string."""
+    return str(UUID(player_id))
+
+
+class MojangProfileResolver:
+    """Resolve Minecraft usernames to player UUIDs.
+
+    Names are looked up in batches of up to MOJANG_BULK_LOOKUP_LIMIT per request,
+    over a single pooled httpx.Client, and results are persisted in a TTL disk
+    cache in DATA_DIR. Names already in the cache are never re-queried until
+    their entry expires.
+
+    Params:
+    -------
+
+    cache_dir (str): Directory for the profile cache
+    ttl (int): Seconds a resolved name stays cached
+    missing_ttl (int): Seconds a name with no profile stays cached
+    base_url (str): Lookup API base URL. Point at a local stub for testing
+    client (httpx.Client): Optional client to use instead of creating one
+    max_retries (int): Times to retry a batch when rate limited (HTTP 429)
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = player_cache_dir,
+        ttl: int = PROFILE_CACHE_TTL,
+        missing_ttl: int = MISSING_PROFILE_CACHE_TTL,
+        base_url: str = MOJANG_API_URL,
+        client: httpx.Client | None = None,
+        max_retries: int = 3,
+    ) -> None:
+        """Open the profile cache, and a pooled client if none is passed."""
+        self.ttl: int = ttl
+        self.missing_ttl: int = missing_ttl
+        self.max_retries: int = max_retries
+        self.cache: Cache = Cache(directory=str(cache_dir))
+
+        self._owns_client: bool = client is None
+        self.client: httpx.Client = client or httpx.Client(
+            base_url=base_url,
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_keepalive_connections=4),
+        )
+
+    def __enter__(self) -> MojangProfileResolver:
+        """Return the resolver, closing it when the with block exits."""
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Close the client & cache."""
+        self.close()
+
+    def close(self) -> None:
+        if self._owns_client:
+            self.client.close()
+        self.cache.close()
+
+    def _lookup_batch(self, names: list[str]) -> dict[str, str]:
+        """POST one batch of names. Returns {lowercase name: dashed uuid}."""
+        for _attempt in range(self.max_retries + 1):
+            try:
+                res = self.client.post(MOJANG_BULK_LOOKUP_PATH, json=names)
+            except httpx.HTTPError as exc:
+                msg = PlayerLookupError(
+                    f"Unhandled exception looking up players {names}. Details: {exc}"
+                )
+                log.error(msg)
+
+                raise msg from exc
+
+            if res.status_code == 429 and _attempt < self.max_retries:
+                _wait = float(res.headers.get("Retry-After", 2**_attempt))
+                log.warning(f"Rate limited by lookup API, retrying in {_wait}s")
+                time.sleep(_wait)
+                continue
+
+            if res.status_code != 200:
+                msg = PlayerLookupError(
+                    f"Non-200 status code looking up players {names}: [{res.status_code}: {res.text}]"
+                )
+                log.error(msg)
+
+                raise msg
+
+            return {
+                profile["name"].lower(): format_uuid(profile["id"])
+                for profile in res.json()
+            }
+
+        raise PlayerLookupError(f"Still rate limited after {self.max_retries} retries")
+
+    def resolve(self, names: list[str]) -> dict[str, str | None]:
+        """Resolve usernames to dashed UUID strings.
+
+        Returns a dict keyed by lowercase username. Names with no Mojang
+        profile map to None. Minecraft usernames are case-insensitive, so
+        lookups and cache keys are lowercased.
+        """
+        resolved: dict[str, str | None] = {}
+        to_query: list[str] = []
+
+        for _name in dict.fromkeys(n.lower() for n in names if n):
+            _cached = self.cache.get(_name)
+            if _cached is None:
+                to_query.append(_name)
+            else:
+                resolved[_name] = _cached or None
+
+        if to_query:
+            log.debug(
+                f"Resolving [{len(to_query)}] uncached player(s), [{len(resolved)}] cached"
+            )
+
+        for i in range(0, len(to_query), MOJANG_BULK_LOOKUP_LIMIT):
+            _batch = to_query[i : i + MOJANG_BULK_LOOKUP_LIMIT]
+            _found = self._lookup_batch(_batch)
+
+            for _name in _batch:
+                _id = _found.get(_name)
+                if _id:
+                    self.cache.set(_name, _id, expire=self.ttl)
+                else:
+                    log.warning(f"No Mojang profile found for player: {_name}")
+                    self.cache.set(_name, _MISSING, expire=self.missing_ttl)
+
+                resolved[_name] = _id
+
+        return resolved
+
+    def fill_missing_ids(
+        self, players: list[WhitelistPlayer], drop_unresolved: bool = True
+    ) -> list[WhitelistPlayer]:
+        """Return a copy of players with every missing id filled in from its name.
+
+        Players that already have an id are passed through untouched. A player
+        whose name can't be resolved would render an invalid whitelist entry,
+        so it is dropped, or a PlayerLookupError is raised if drop_unresolved
+        is False. Every returned player has an id.
+        """
+        _ids = self.resolve([p.name for p in players if not p.id and p.name])
+
+        filled: list[WhitelistPlayer] = []
+        unresolved: list[str] = []
+        for _player in players:
+            if _player.id:
+                filled.append(_player)
+                continue
+
+            _id = _ids.get(_player.name.lower()) if _player.name else None
+            if _id is None:
+                unresolved.append(_player.name or "<no name>")
+                continue
+
+            filled.append(_player.model_copy(update={"id": _id}))
+
+        if unresolved and not drop_unresolved:
+            msg = PlayerLookupError(f"Could not resolve ids for players: {unresolved}")
+            log.error(msg)
+
+            raise msg
+
+        if unresolved:
+            log.warning(
+                f"Dropping [{len(unresolved)}] unresolved player(s) from whitelist: {unresolved}"
+            )
+
+        return filled
+
+
+def resolve_whitelist_players(
+    players: list[WhitelistPlayer],
+    resolver: MojangProfileResolver | None = None,
+    drop_unresolved: bool = True,
+) -> list[WhitelistPlayer]:
+    """Fill in missing WhitelistPlayer ids, creating a resolver if none is passed."""
+    if resolver:
+        return resolver.fill_missing_ids(players, drop_unresolved=drop_unresolved)
+
+    with MojangProfileResolver() as _resolver:
+        return _resolver.fill_missing_ids(players, drop_unresolved=drop_unresolved)
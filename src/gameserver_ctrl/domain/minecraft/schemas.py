@@ -1,16 +1,19 @@
 from __future__ import annotations
 
+import hashlib
 from pathlib import Path
 from typing import Union
 from uuid import UUID, uuid4
 
 from gameserver_ctrl.constants import DATA_DIR, OUTPUT_DIR, TEMPLATES_DIR
 from gameserver_ctrl.utils import jinja_utils
+from gameserver_ctrl.utils.output_utils import OutputBackend
 
 ## Import jinja2 classes for typing & autocomplete
 from jinja2 import Environment, FileSystemLoader, Template
 from loguru import logger as log
-from pydantic import BaseModel, Field, ValidationError, validator
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from pydantic_core import to_json
 
 mc_templates_dir: str = f"{TEMPLATES_DIR}/minecraft"
 mc_dotenv_dir: str = f"{mc_templates_dir}/dotenv"
@@ -21,6 +24,18 @@ mc_containers_dir: str = f"{mc_templates_dir}/server_containers"
 mc_filegen_output_dir: str = f"{OUTPUT_DIR}/minecraft/"
 
 
+def render_input_key(template_path: str, context: dict) -> str:
+    """Hash a template path & its render context into a stable key.
+
+    Used to find servers whose outputs render identically, so each distinct
+    output is only rendered once per fleet run.
+    """
+    _hash = hashlib.sha256(template_path.encode())
+    _hash.update(to_json(context, exclude_none=False))
+
+    return _hash.hexdigest()
+
+
 class WhitelistPlayer(BaseModel):
     """Class representation of Minecraft whitelist.json player file.
 
@@ -116,12 +131,13 @@ class WhitelistFile(BaseModel):
 
     @property
     def template_env(self) -> Environment:
-        """Return a jinja2.Environment object from the template_loader property.
+        """Return the shared jinja2.Environment for template_dir.
 
         This environment can be used to create jinja2.Template objects. The environment
-        prepares the .j2 template file for manipulation.
+        prepares the .j2 template file for manipulation. It is shared by every
+        object with the same template_dir, so templates are compiled once.
         """
-        _env = jinja_utils.create_loader_env(_loader=self.template_loader)
+        _env = jinja_utils.get_dir_env(f"{self.template_dir}")
 
         return _env
 
@@ -147,30 +163,55 @@ class WhitelistFile(BaseModel):
 
         return _template
 
+    @property
+    def render_context(self) -> dict:
+        """Return the variables passed to the template when rendering."""
+        _context = {"whitelist_players": self.whitelist_players}
+
+        return _context
+
+    @property
+    def render_key(self) -> str:
+        """Return a hash of everything that feeds this object's render.
+
+        Objects with the same render_key render identical output.
+        """
+        return render_input_key(self.template_path, self.render_context)
+
     @property
     def template_render(self) -> str:
         """Return a string of the rendered Template.
         """
-        _render = self.template.render(whitelist_players=self.whitelist_players)
+        _render = self.template.render(**self.render_context)
 
         return _render
 
-    def render_to_file(self) -> None:
+    def render_to_file(
+        self, backend: OutputBackend | None = None, arcname: str | None = None
+    ) -> None:
         """Output rendered Template string to a file.
+
+        If an OutputBackend is passed (i.e. a tar/zip archive), the render is
+        written into it at arcname (default: filename) instead of output_file.
         """
+        _outfile = (arcname or self.filename) if backend else self.output_file
+
         try:
-            jinja_utils.render_template_to_file(
-                _render=self.template_render, _outfile=self.output_file
-            )
+            if backend:
+                backend.write_text(_outfile, self.template_render)
+            else:
+                jinja_utils.render_template_to_file(
+                    _render=self.template_render, _outfile=_outfile
+                )
 
             return_obj = {
                 "success": True,
-                "reason": f"Successfully rendered template to: [{self.output_file}]",
+                "reason": f"Successfully rendered template to: [{_outfile}]",
             }
         except:
             return_obj = {
                 "success": False,
-                "reason": f"Uncaught exception rendering template to: [{self.output_file}]",
+                "reason": f"Uncaught exception rendering template to: [{_outfile}]",
             }
 
         return return_obj
@@ -197,6 +238,10 @@ class ForgeServerEnvData(BaseModel):
     whitelist_file (str): TODO
     whitelist_override (bool): TODO
     modrinth_project_slugs (str): TODO
+    memory (str): JVM heap size, i.e. "4096M". See performance.compute_settings()
+    jvm_xx_opts (str): Extra -XX JVM flags, i.e. GC tuning flags
+    view_distance (int): server.properties view-distance
+    simulation_distance (int): server.properties simulation-distance
     """
 
     image_tag: str | None = Field(default=None)
@@ -210,6 +255,10 @@ class ForgeServerEnvData(BaseModel):
     whitelist_file: str | None = Field(default=None)
     whitelist_override: bool | None = Field(default=False)
     modrinth_project_slugs: str | None = Field(default=None)
+    memory: str | None = Field(default=None)
+    jvm_xx_opts: str | None = Field(default=None)
+    view_distance: int | None = Field(default=None)
+    simulation_distance: int | None = Field(default=None)
 
     @property
     def project_slugs(self) -> str:
@@ -217,6 +266,14 @@ class ForgeServerEnvData(BaseModel):
 
         return _slugs
 
+    @property
+    def mod_count(self) -> int:
+        """Number of Modrinth projects the server installs."""
+        if not self.modrinth_project_slugs:
+            return 0
+
+        return len([s for s in self.modrinth_project_slugs.split(",") if s.strip()])
+
 
 class ForgeServerEnvFile(BaseModel):
     """Class representation of a Minecraft Docker .env file.
@@ -241,6 +298,14 @@ class ForgeServerEnvFile(BaseModel):
 
     env_data: ForgeServerEnvData | None = Field(default=None)
 
+    @property
+    def filename(self) -> str:
+        """Create filename from name, adding ext if one is set.
+        """
+        _filename = f"{self.name}.{self.ext}" if self.ext else f"{self.name}"
+
+        return _filename
+
     @property
     def output_file(self) -> str:
         """Dynamically create path to save whitelist.json file to
@@ -280,12 +345,13 @@ class ForgeServerEnvFile(BaseModel):
 
     @property
     def template_env(self) -> Environment:
-        """Return a jinja2.Environment object from the template_loader property.
+        """Return the shared jinja2.Environment for template_dir.
 
         This environment can be used to create jinja2.Template objects. The environment
-        prepares the .j2 template file for manipulation.
+        prepares the .j2 template file for manipulation. It is shared by every
+        object with the same template_dir, so templates are compiled once.
         """
-        _env = jinja_utils.create_loader_env(_loader=self.template_loader)
+        _env = jinja_utils.get_dir_env(f"{self.template_dir}")
 
         return _env
 
@@ -311,30 +377,55 @@ class ForgeServerEnvFile(BaseModel):
 
         return _template
 
+    @property
+    def render_context(self) -> dict:
+        """Return the variables passed to the template when rendering."""
+        _context = {"env_data": self.env_data}
+
+        return _context
+
+    @property
+    def render_key(self) -> str:
+        """Return a hash of everything that feeds this object's render.
+
+        Objects with the same render_key render identical output.
+        """
+        return render_input_key(self.template_path, self.render_context)
+
     @property
     def template_render(self) -> str:
         """Return a string of the rendered Template.
         """
-        _render = self.template.render(env_data=self.env_data)
+        _render = self.template.render(**self.render_context)
 
         return _render
 
-    def render_to_file(self) -> None:
+    def render_to_file(
+        self, backend: OutputBackend | None = None, arcname: str | None = None
+    ) -> None:
         """Output rendered Template string to a file.
+
+        If an OutputBackend is passed (i.e. a tar/zip archive), the render is
+        written into it at arcname (default: filename) instead of output_file.
         """
+        _outfile = (arcname or self.filename) if backend else self.output_file
+
         try:
-            jinja_utils.render_template_to_file(
-                _render=self.template_render, _outfile=self.output_file
-            )
+            if backend:
+                backend.write_text(_outfile, self.template_render)
+            else:
+                jinja_utils.render_template_to_file(
+                    _render=self.template_render, _outfile=_outfile
+                )
 
             return_obj = {
                 "success": True,
-                "reason": f"Successfully rendered template to: [{self.output_file}]",
+                "reason": f"Successfully rendered template to: [{_outfile}]",
             }
         except:
             return_obj = {
                 "success": False,
-                "reason": f"Uncaught exception rendering template to: [{self.output_file}]",
+                "reason": f"Uncaught exception rendering template to: [{_outfile}]",
             }
 
         return return_obj
@@ -363,11 +454,14 @@ class ForgeServerComposeFile(BaseModel):
 
     compose_ver: str | None = Field(default="3.8")
 
-    @validator("output_path")
+    @field_validator("output_path")
+    @classmethod
     def valid_output_path(cls, v) -> str:
-        v.strip("/")
+        if v is None:
+            return v
 
-        return v
+        ## Only strip trailing slashes, an absolute path must keep its leading "/"
+        return v.rstrip("/")
 
     @property
     def filename(self) -> str:
@@ -421,12 +515,13 @@ class ForgeServerComposeFile(BaseModel):
 
     @property
     def template_env(self) -> Environment:
-        """Return a jinja2.Environment object from the template_loader property.
+        """Return the shared jinja2.Environment for template_dir.
 
         This environment can be used to create jinja2.Template objects. The environment
-        prepares the .j2 template file for manipulation.
+        prepares the .j2 template file for manipulation. It is shared by every
+        object with the same template_dir, so templates are compiled once.
         """
-        _env = jinja_utils.create_loader_env(_loader=self.template_loader)
+        _env = jinja_utils.get_dir_env(f"{self.template_dir}")
         log.debug(f"[{self.name}] Template env: {_env}")
 
         return _env
@@ -453,30 +548,55 @@ class ForgeServerComposeFile(BaseModel):
 
         return _template
 
+    @property
+    def render_context(self) -> dict:
+        """Return the variables passed to the template when rendering."""
+        _context = {}
+
+        return _context
+
+    @property
+    def render_key(self) -> str:
+        """Return a hash of everything that feeds this object's render.
+
+        Objects with the same render_key render identical output.
+        """
+        return render_input_key(self.template_path, self.render_context)
+
     @property
     def template_render(self) -> str:
         """Return a string of the rendered Template.
         """
-        _render = self.template.render()
+        _render = self.template.render(**self.render_context)
 
         return _render
 
-    def render_to_file(self) -> dict[str, bool]:
+    def render_to_file(
+        self, backend: OutputBackend | None = None, arcname: str | None = None
+    ) -> dict[str, bool]:
         """Output rendered Template string to a file.
+
+        If an OutputBackend is passed (i.e. a tar/zip archive), the render is
+        written into it at arcname (default: filename) instead of output_file.
         """
+        _outfile = (arcname or self.filename) if backend else self.output_file
+
         try:
-            jinja_utils.render_template_to_file(
-                _render=self.template_render, _outfile=self.output_file
-            )
+            if backend:
+                backend.write_text(_outfile, self.template_render)
+            else:
+                jinja_utils.render_template_to_file(
+                    _render=self.template_render, _outfile=_outfile
+                )
 
             return_obj = {
                 "success": True,
-                "reason": f"Successfully rendered template to: [{self.output_file}]",
+                "reason": f"Successfully rendered template to: [{_outfile}]",
             }
         except:
             return_obj = {
                 "success": False,
-                "reason": f"Uncaught exception rendering template to: [{self.output_file}]",
+                "reason": f"Uncaught exception rendering template to: [{_outfile}]",
             }
 
         log.debug(f"[{self.name}] return object: {return_obj}]")
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import Union
+import shutil
+from typing import BinaryIO, Callable, Union
 from uuid import UUID, uuid4
 
 from gameserver_ctrl.constants import DATA_DIR, OUTPUT_DIR, TEMPLATES_DIR
-from gameserver_ctrl.utils import jinja_utils
+from gameserver_ctrl.utils import jinja_utils, output_utils
+from gameserver_ctrl.utils.output_utils import OutputBackend
+from gameserver_ctrl.utils.profile_utils import MemoryProfiler, profile_stage
 
 ## Import jinja2 classes for typing & autocomplete
 from jinja2 import Environment, FileSystemLoader, Template
 from loguru import logger as log
-from pydantic import BaseModel, Field, ValidationError, validator
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
 mc_templates_dir: str = f"{TEMPLATES_DIR}/minecraft"
 mc_dotenv_dir: str = f"{mc_templates_dir}/dotenv"
@@ -26,6 +30,7 @@ from .schemas import (
     ForgeServerEnvFile,
     WhitelistFile,
     WhitelistPlayer,
+    render_input_key,
 )
 
 class MCForgeServer(BaseModel):
@@ -48,11 +53,27 @@ class MCForgeServer(BaseModel):
     whitelist_file (str): ...
 
     compose_file (str): ...
+
+    host (str): Name of the fleet host this server runs on. Set to pin the
+        server to a host, or leave empty and let placement.plan_placement() pick one.
+
+    performance_profile (str): Name of a performance.PROFILES entry used to size
+        the server's JVM & view distances
+
+    expected_players (int): Expected concurrent players. Defaults to the
+        whitelist's size when not set
+
+    startup_priority (int): Servers with higher priority are booted first by
+        startup.StartupScheduler
     """
 
     name: str | None = Field(default="example_forge_server")
     output_path: str | None = Field(default=mc_filegen_output_dir)
     init_dirs: list[str] | None = ["data"]
+    host: str | None = Field(default=None)
+    performance_profile: str | None = Field(default=None)
+    expected_players: int | None = Field(default=None)
+    startup_priority: int | None = Field(default=0)
 
     env_file: ForgeServerEnvFile | None = Field(default=None)
     whitelist_file: WhitelistFile | None = Field(default=None)
@@ -68,56 +89,222 @@ class MCForgeServer(BaseModel):
 
         return _out_dir.replace("//", "")
 
-    def create_server(self) -> None:
-        """Compile & render Minecraft Forge server files."""
-        if self.output_dir:
-            if not Path(self.output_dir).exists():
-                Path(self.output_dir).mkdir(parents=True)
+    @property
+    def mod_count(self) -> int:
+        if self.env_file and self.env_file.env_data:
+            return self.env_file.env_data.mod_count
 
-        for dir in self.init_dirs:
-            if not Path(f"{self.output_dir}/{dir}").exists():
-                Path(f"{self.output_dir}/{dir}").mkdir(parents=True)
+        return 0
 
-        ## Set output path for server files
-        self.env_file.output_path = self.output_dir
-        self.whitelist_file.output_path = self.output_dir
-        self.compose_file.output_path = self.output_dir
+    @property
+    def player_count(self) -> int:
+        """Expected concurrent players, falling back to the whitelist's size."""
+        if self.expected_players is not None:
+            return self.expected_players
 
-        if Path(self.output_dir).exists():
-            log.warning(
-                FileExistsError(
-                    f"Did not render Minecraft server template. Output directory already exists: {self.output_dir}."
-                )
+        if self.whitelist_file and self.whitelist_file.whitelist_players:
+            return len(self.whitelist_file.whitelist_players)
+
+        return 0
+
+    @property
+    def server_files(self) -> dict[str, BaseModel]:
+        """Map each kind of output this server renders to the object that renders it.
+
+        Kinds are "env", "whitelist", "compose" and "script".
+        """
+        _files = {
+            "env": self.env_file,
+            "whitelist": self.whitelist_file,
+            "compose": self.compose_file,
+            "script": RecreateServerScript(server=self),
+        }
+
+        return {_kind: _file for _kind, _file in _files.items() if _file is not None}
+
+    def render_files(
+        self,
+        kinds: list[str] | None = None,
+        backend: OutputBackend | None = None,
+        render_cache: RenderCache | None = None,
+    ) -> None:
+        """Render this server's files, or only the kinds listed in kinds.
+
+        Without a backend, files are written to output_dir through a
+        FileSystemBackend. With a backend, they are written into it under
+        "<name>/<filename>". If a RenderCache is passed, outputs another server
+        already rendered identically are reused instead of rendered again.
+        """
+        _loose_backend = (
+            output_utils.FileSystemBackend(self.output_dir) if backend is None else None
+        )
+
+        for _kind, _file in self.server_files.items():
+            if kinds is not None and _kind not in kinds:
+                continue
+
+            ## Only kinds that can render identically for different servers are cached
+            _key = (
+                _file.render_key
+                if render_cache is not None and _kind in render_cache.kinds
+                else None
             )
-        else:
-            ## Render server files
+
             try:
-                self.env_file.render_to_file()
+                if backend and _key is not None:
+                    backend.write_text(
+                        f"{self.name}/{_file.filename}",
+                        render_cache.get_render(_key, lambda f=_file: f.template_render),
+                    )
+                    _result = {"success": True}
+                elif backend:
+                    _result = _file.render_to_file(
+                        backend=backend, arcname=f"{self.name}/{_file.filename}"
+                    )
+                else:
+                    _file.output_path = self.output_dir
+
+                    if _key is not None and render_cache.materialize(
+                        _key, _file.output_file
+                    ):
+                        _result = {"success": True}
+                    else:
+                        _result = _file.render_to_file(
+                            backend=_loose_backend, arcname=_file.filename
+                        )
+                        if _key is not None and _result["success"]:
+                            render_cache.add_file(_key, _file.output_file)
             except Exception as exc:
                 msg = Exception(
-                    f"Unhandled exception rendering .env file. Details: {exc}"
+                    f"Unhandled exception rendering {_file.filename} file. Details: {exc}"
                 )
                 log.error(msg)
 
                 raise msg
-            try:
-                self.whitelist_file.render_to_file()
-            except Exception as exc:
-                msg = Exception(
-                    f"Unhandled exception rendering whitelist.json file. Details: {exc}"
+
+            if not _result["success"]:
+                log.error(f"[{self.name}] {_result['reason']}")
+
+    def create_server(
+        self,
+        backend: OutputBackend | None = None,
+        render_cache: RenderCache | None = None,
+    ) -> None:
+        """Compile & render Minecraft Forge server files.
+
+        Pass an OutputBackend (see utils.output_utils) to stream the files into
+        an archive or stream instead of writing loose files to output_dir. Pass
+        a RenderCache shared across servers to deduplicate identical outputs,
+        see create_servers().
+        """
+        if backend:
+            for dir in self.init_dirs:
+                backend.make_dir(f"{self.name}/{dir}")
+
+            self.render_files(backend=backend, render_cache=render_cache)
+
+            return
+
+        ## Check before creating any directories, otherwise the output dir
+        #  always exists by the time it's checked and nothing is rendered
+        if Path(self.output_dir).exists():
+            log.warning(
+                FileExistsError(
+                    f"Did not render Minecraft server template. Output directory already exists: {self.output_dir}."
                 )
-                log.error(msg)
+            )
+        else:
+            Path(self.output_dir).mkdir(parents=True)
 
-                raise msg
+            _loose_backend = output_utils.FileSystemBackend(self.output_dir)
+            for dir in self.init_dirs:
+                _loose_backend.make_dir(dir)
+
+            ## Render server files
+            self.render_files(render_cache=render_cache)
+
+
+## Output kinds that can render identically for different servers
+DEDUP_KINDS: tuple[str, ...] = ("whitelist", "compose")
+
+
+class RenderCache:
+    """Outputs already rendered during a fleet run, keyed by render_key.
+
+    When writing loose files, the first server to render an output keeps the
+    rendered file, and every later server with the same render_key gets a
+    copy of it (or a hardlink, with link_mode="hardlink"). When writing to an
+    OutputBackend, the rendered string is kept and written again for each
+    server. Either way, each distinct output is rendered once.
+
+    Only the kinds in DEDUP_KINDS are cached. The .env & recreate script
+    include the server's name, so they never repeat, and keeping them would
+    only grow memory with the size of the fleet.
+
+    Hardlinks are opt-in: hardlinked outputs share one inode, so editing one
+    server's file with an editor that writes in place silently changes it for
+    every server in its group. Re-rendering is safe either way, because
+    rendering replaces files instead of writing in place.
+
+    Params:
+    -------
+
+    link_mode (str): "copy", or "hardlink" (falls back to copying across filesystems)
+    kinds (tuple[str]): Output kinds to deduplicate
+    """
+
+    def __init__(
+        self, link_mode: str = "copy", kinds: tuple[str, ...] = DEDUP_KINDS
+    ) -> None:
+        """Create an empty cache."""
+        if link_mode not in ("hardlink", "copy"):
+            raise ValueError(f"Invalid link_mode: {link_mode}. Options: hardlink, copy")
+
+        self.link_mode: str = link_mode
+        self.kinds: tuple[str, ...] = kinds
+        self.rendered: int = 0
+        self.reused: int = 0
+
+        self._files: dict[str, str] = {}
+        self._renders: dict[str, str] = {}
+
+    def add_file(self, key: str, path: str) -> None:
+        self._files[key] = path
+        self.rendered += 1
+
+    def materialize(self, key: str, path: str) -> bool:
+        """Link or copy an already-rendered output to path. False if there isn't one."""
+        _src = self._files.get(key)
+        if _src is None or not Path(_src).exists():
+            return False
+
+        if Path(path).exists():
+            Path(path).unlink()
+
+        if self.link_mode == "hardlink":
             try:
-                self.compose_file.render_to_file()
-            except Exception as exc:
-                msg = Exception(
-                    f"Unhandled exception rendering docker-compose.yml file. Details: {exc}"
-                )
-                log.error(msg)
+                os.link(_src, path)
+            except OSError:
+                shutil.copy(_src, path)
+        else:
+            ## copy() keeps the mode FileSystemBackend wrote the source with
+            shutil.copy(_src, path)
 
-                raise msg
+        self.reused += 1
+
+        return True
+
+    def get_render(self, key: str, render: Callable[[], str]) -> str:
+        """Return the cached render for key, calling render() on a miss."""
+        _render = self._renders.get(key)
+        if _render is None:
+            _render = render()
+            self._renders[key] = _render
+            self.rendered += 1
+        else:
+            self.reused += 1
+
+        return _render
 
 
 class RecreateServerScript(BaseModel):
@@ -125,7 +312,7 @@ class RecreateServerScript(BaseModel):
     ext: str = "sh"
 
     output_path: str | None = Field(default=None)
-    template_dir: str | None = Field(default=mc_scripts_dir)
+    template_dir: str | None = Field(default=f"{mc_scripts_dir}/bash")
     template_file: str | None = Field(default="template_recreate_server_sh.j2")
 
     server: MCForgeServer | None = Field(default=None)
@@ -170,12 +357,13 @@ class RecreateServerScript(BaseModel):
 
     @property
     def template_env(self) -> Environment:
-        """Return a jinja2.Environment object from the template_loader property.
+        """Return the shared jinja2.Environment for template_dir.
 
         This environment can be used to create jinja2.Template objects. The environment
-        prepares the .j2 template file for manipulation.
+        prepares the .j2 template file for manipulation. It is shared by every
+        object with the same template_dir, so templates are compiled once.
         """
-        _env = jinja_utils.create_loader_env(_loader=self.template_loader)
+        _env = jinja_utils.get_dir_env(f"{self.template_dir}")
 
         return _env
 
@@ -201,30 +389,130 @@ class RecreateServerScript(BaseModel):
 
         return _template
 
+    @property
+    def render_context(self) -> dict:
+        """Return the variables passed to the template when rendering."""
+        _context = {"server_obj": self.server}
+
+        return _context
+
+    @property
+    def render_key(self) -> str:
+        """Return a hash of everything that feeds this object's render.
+
+        Objects with the same render_key render identical output. The script
+        template only uses the server's name, so only the name is hashed rather
+        than serializing the whole server. Scripts are never deduplicated (see
+        DEDUP_KINDS), but watch mode uses the key to tell if a script changed.
+        """
+        return render_input_key(self.template_path, {"server_name": self.server.name})
+
     @property
     def template_render(self) -> str:
         """Return a string of the rendered Template.
         """
-        _render = self.template.render(server_obj=self.server)
+        _render = self.template.render(**self.render_context)
 
         return _render
 
-    def render_to_file(self) -> None:
+    def render_to_file(
+        self, backend: OutputBackend | None = None, arcname: str | None = None
+    ) -> None:
         """Output rendered Template string to a file.
+
+        If an OutputBackend is passed (i.e. a tar/zip archive), the render is
+        written into it at arcname (default: filename) instead of output_file.
         """
+        _outfile = (arcname or self.filename) if backend else self.output_file
+
         try:
-            jinja_utils.render_template_to_file(
-                _render=self.template_render, _outfile=self.output_file
-            )
+            if backend:
+                backend.write_text(_outfile, self.template_render)
+            else:
+                jinja_utils.render_template_to_file(
+                    _render=self.template_render, _outfile=_outfile
+                )
 
             return_obj = {
                 "success": True,
-                "reason": f"Successfully rendered template to: [{self.output_file}]",
+                "reason": f"Successfully rendered template to: [{_outfile}]",
             }
         except:
             return_obj = {
                 "success": False,
-                "reason": f"Uncaught exception rendering template to: [{self.output_file}]",
+                "reason": f"Uncaught exception rendering template to: [{_outfile}]",
             }
 
         return return_obj
+
+
+def _whitelist_size(servers: list[MCForgeServer]) -> int:
+    """Total whitelist entries across servers, used to normalize profiles per player."""
+    return sum(
+        len(s.whitelist_file.whitelist_players)
+        for s in servers
+        if s.whitelist_file and s.whitelist_file.whitelist_players
+    )
+
+
+def create_servers(
+    servers: list[MCForgeServer],
+    backend: OutputBackend | None = None,
+    link_mode: str = "copy",
+    profiler: MemoryProfiler | None = None,
+) -> RenderCache:
+    """Create many servers, rendering each distinct output only once.
+
+    Servers are grouped by a hash of each output's render inputs (template
+    path and template variables). Each distinct whitelist & compose file is
+    rendered once and then copied (or hardlinked, with link_mode="hardlink",
+    see RenderCache) for the rest of its group, so their run time scales with
+    the number of distinct configurations rather than the number of servers.
+
+    Returns the RenderCache, whose rendered/reused counts show how much was
+    deduplicated. Pass a MemoryProfiler to profile the run as a "create
+    servers" stage.
+    """
+    render_cache = RenderCache(link_mode=link_mode)
+
+    with profile_stage(
+        profiler,
+        "create servers",
+        servers=len(servers),
+        players=_whitelist_size(servers),
+    ):
+        for _server in servers:
+            _server.create_server(backend=backend, render_cache=render_cache)
+
+    log.info(
+        f"Created [{len(servers)}] server(s): {', '.join(render_cache.kinds)} outputs rendered [{render_cache.rendered}] time(s), reused [{render_cache.reused}]"
+    )
+
+    return render_cache
+
+
+def export_fleet(
+    servers: list[MCForgeServer],
+    target: str | Path | BinaryIO | None = None,
+    archive_format: str | None = None,
+    profiler: MemoryProfiler | None = None,
+) -> None:
+    """Stream every server's files into a single archive, in one sequential write.
+
+    target can be an archive path (format inferred from the extension), a
+    binary file-like object, or None for stdout. Each server's files are placed
+    under "<server name>/" in the archive. Pass a MemoryProfiler to profile the
+    export as an "export fleet" stage.
+    """
+    with profile_stage(
+        profiler,
+        "export fleet",
+        servers=len(servers),
+        players=_whitelist_size(servers),
+    ):
+        with output_utils.open_backend(
+            target, archive_format=archive_format
+        ) as _backend:
+            create_servers(servers, backend=_backend)
+
+    log.info(f"Exported [{len(servers)}] server(s) to: {target or 'stdout'}")
@@ -0,0 +1,503 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import struct
+import time
+from typing import Awaitable, Callable
+
+from .server_gen import MCForgeServer
+
+from loguru import logger as log
+from pydantic import BaseModel, Field
+
+## Async callable that starts or stops a proxied backend server
+BackendControl = Callable[[], Awaitable[None]]
+
+## Minecraft protocol handshake "next state" values
+STATE_STATUS: int = 1
+STATE_LOGIN: int = 2
+
+## Status response used until a real one has been fetched from the backend
+DEFAULT_STATUS: dict = {
+    "version": {"name": "Forge", "protocol": -1},
+    "players": {"max": 20, "online": 0, "sample": []},
+    "description": {"text": "A Minecraft Server"},
+}
+
+
+class ProtocolError(Exception):
+    """Raised when a client sends something that isn't a valid Minecraft packet."""
+
+
+def encode_varint(value: int) -> bytes:
+    """Encode an int as a Minecraft protocol VarInt."""
+    _out = bytearray()
+    value &= 0xFFFFFFFF
+
+    while True:
+        _byte = value & 0x7F
+        value >>= 7
+        if value:
+            _out.append(_byte | 0x80)
+        else:
+            _out.append(_byte)
+            return bytes(_out)
+
+
+def decode_varint(data: bytes, offset: int = 0) -> tuple[int, int]:
+    """Decode a VarInt from data at offset. Returns (value, new offset)."""
+    _value = 0
+    for _i in range(5):
+        if offset >= len(data):
+            raise ProtocolError("Truncated VarInt")
+
+        _byte = data[offset]
+        offset += 1
+        _value |= (_byte & 0x7F) << (7 * _i)
+        if not _byte & 0x80:
+            if _value & 0x80000000:
+                _value -= 1 << 32
+            return _value, offset
+
+    raise ProtocolError("VarInt is too long")
+
+
+def encode_string(value: str) -> bytes:
+    _data = value.encode("utf-8")
+
+    return encode_varint(len(_data)) + _data
+
+
+def encode_packet(packet_id: int, payload: bytes = b"") -> bytes:
+    _body = encode_varint(packet_id) + payload
+
+    return encode_varint(len(_body)) + _body
+
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple[bytes, bytes]:
+    """Read one length-prefixed packet. Returns (raw bytes incl. length, body)."""
+    _prefix = bytearray()
+    for _ in range(5):
+        _byte = await reader.readexactly(1)
+        _prefix += _byte
+        if not _byte[0] & 0x80:
+            break
+
+    _length, _ = decode_varint(bytes(_prefix))
+    if _length <= 0 or _length > 2**21:
+        raise ProtocolError(f"Invalid packet length: {_length}")
+
+    _body = await reader.readexactly(_length)
+
+    return bytes(_prefix) + _body, _body
+
+
+def parse_handshake(body: bytes) -> tuple[int, str, int, int]:
+    """Parse a handshake body. Returns (protocol, address, port, next state)."""
+    _packet_id, _offset = decode_varint(body)
+    if _packet_id != 0x00:
+        raise ProtocolError(f"Expected handshake, got packet id {_packet_id}")
+
+    _protocol, _offset = decode_varint(body, _offset)
+    _addr_len, _offset = decode_varint(body, _offset)
+    _address = body[_offset : _offset + _addr_len].decode("utf-8", errors="replace")
+    _offset += _addr_len
+    (_port,) = struct.unpack_from(">H", body, _offset)
+    _next_state, _ = decode_varint(body, _offset + 2)
+
+    return _protocol, _address, _port, _next_state
+
+
+async def query_status(host: str, port: int, timeout: float = 5.0) -> dict:
+    """Fetch the status JSON (MOTD, version, players) from a running server."""
+    _reader, _writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port), timeout
+    )
+
+    try:
+        _handshake = (
+            encode_varint(-1)
+            + encode_string(host)
+            + struct.pack(">H", port)
+            + encode_varint(STATE_STATUS)
+        )
+        _writer.write(encode_packet(0x00, _handshake) + encode_packet(0x00))
+        await _writer.drain()
+
+        _, _body = await asyncio.wait_for(read_packet(_reader), timeout)
+        _, _offset = decode_varint(_body)
+        _json_len, _offset = decode_varint(_body, _offset)
+
+        return json.loads(_body[_offset : _offset + _json_len])
+    finally:
+        _writer.close()
+
+
+async def _docker(*args: str) -> None:
+    _proc = await asyncio.create_subprocess_exec(
+        "docker",
+        *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, _stderr = await _proc.communicate()
+
+    if _proc.returncode != 0:
+        raise RuntimeError(f"docker {' '.join(args)} failed: {_stderr.decode().strip()}")
+
+
+class SleepProxyConfig(BaseModel):
+    """Settings for one server's sleep proxy.
+
+    Params:
+    -------
+
+    name (str): Server name, used in logs
+    container_name (str): Container started/stopped by the default controls
+    listen_host (str): Address the proxy listens on
+    listen_port (int): Port players connect to
+    backend_host (str): Address the real server listens on
+    backend_port (int): Port the real server listens on
+    idle_timeout (float): Seconds with no players before the backend is stopped
+    start_timeout (float): Seconds to wait for a woken backend to accept connections
+    hold_login (float): Seconds to hold the waking player's login open, in case
+        the backend comes up fast enough to let them straight in
+    check_interval (float): Seconds between idle checks
+    sleeping_motd (str): MOTD suffix shown while the backend is stopped
+    starting_message (str): Disconnect message for players who woke the server
+    """
+
+    name: str
+    container_name: str | None = Field(default=None)
+    listen_host: str | None = Field(default="0.0.0.0")
+    listen_port: int | None = Field(default=25565)
+    backend_host: str | None = Field(default="127.0.0.1")
+    backend_port: int | None = Field(default=35565)
+    idle_timeout: float | None = Field(default=15 * 60)
+    start_timeout: float | None = Field(default=5 * 60)
+    hold_login: float | None = Field(default=20)
+    check_interval: float | None = Field(default=30)
+    sleeping_motd: str | None = Field(default="Sleeping - join to wake it up")
+    starting_message: str | None = Field(
+        default="Server is starting up, please reconnect in a minute."
+    )
+
+    @classmethod
+    def from_server(
+        cls, server: MCForgeServer, backend_port_offset: int = 10000, **kwargs
+    ) -> SleepProxyConfig:
+        """Build a config that listens on the server's server_port.
+
+        The backend is expected on server_port + backend_port_offset, see
+        proxied_server().
+        """
+        _env_data = server.env_file.env_data
+
+        return cls(
+            name=server.name,
+            container_name=_env_data.container_name,
+            listen_port=_env_data.server_port,
+            backend_port=_env_data.server_port + backend_port_offset,
+            **kwargs,
+        )
+
+
+def proxied_server(server: MCForgeServer, backend_port_offset: int = 10000) -> MCForgeServer:
+    """Return a copy of server whose container publishes on the proxy's backend port."""
+    _server = server.model_copy(deep=True)
+    _env_data = _server.env_file.env_data
+    _env_data.server_port = _env_data.server_port + backend_port_offset
+
+    return _server
+
+
+class SleepProxy:
+    """Front proxy that sleeps an idle server and wakes it when a player joins.
+
+    While the backend is running, connections are piped straight through.
+    While it is stopped, status pings are answered from the last status the
+    backend returned (so the server stays in players' lists) and the first
+    login attempt starts the backend. After idle_timeout with no player
+    connections, the backend is stopped again. Status pings never count as
+    activity.
+
+    Params:
+    -------
+
+    config (SleepProxyConfig): Proxy settings
+    start_backend (BackendControl): Async callable that starts the server.
+        Defaults to `docker start <container_name>`
+    stop_backend (BackendControl): Async callable that stops the server.
+        Defaults to `docker stop <container_name>`
+    """
+
+    def __init__(
+        self,
+        config: SleepProxyConfig,
+        start_backend: BackendControl | None = None,
+        stop_backend: BackendControl | None = None,
+    ) -> None:
+        """Create a proxy that starts out assuming the backend is stopped."""
+        self.config: SleepProxyConfig = config
+        _container = config.container_name or config.name
+        self.start_backend: BackendControl = start_backend or (
+            lambda: _docker("start", _container)
+        )
+        self.stop_backend: BackendControl = stop_backend or (
+            lambda: _docker("stop", _container)
+        )
+
+        ## One of "stopped", "starting", "running", "stopping"
+        self.state: str = "stopped"
+        self.status_cache: dict = dict(DEFAULT_STATUS)
+        self.active_connections: int = 0
+        self.last_activity: float = time.monotonic()
+
+        self._ready: asyncio.Event = asyncio.Event()
+        ## Held while the backend is starting or stopping, so a wake that
+        #  arrives mid-stop waits for the stop to finish instead of racing it
+        self._control_lock: asyncio.Lock = asyncio.Lock()
+        self._wake_task: asyncio.Task | None = None
+        self._monitor_task: asyncio.Task | None = None
+        self._server: asyncio.Server | None = None
+
+    async def backend_reachable(self) -> bool:
+        try:
+            _, _writer = await asyncio.wait_for(
+                asyncio.open_connection(self.config.backend_host, self.config.backend_port),
+                2.0,
+            )
+        except (OSError, asyncio.TimeoutError):
+            return False
+
+        _writer.close()
+
+        return True
+
+    async def refresh_status(self) -> None:
+        try:
+            self.status_cache = await query_status(
+                self.config.backend_host, self.config.backend_port
+            )
+        except (OSError, asyncio.TimeoutError, ProtocolError, ValueError) as exc:
+            log.debug(f"[{self.config.name}] Could not refresh status. Details: {exc}")
+
+    def sleeping_status(self) -> dict:
+        _status = json.loads(json.dumps(self.status_cache))
+        _status.setdefault("players", {})["online"] = 0
+        _status["players"]["sample"] = []
+
+        _description = _status.get("description", "")
+        _text = _description.get("text", "") if isinstance(_description, dict) else _description
+        _status["description"] = {"text": f"{_text}\n{self.config.sleeping_motd}".strip()}
+
+        return _status
+
+    async def _wake(self) -> None:
+        async with self._control_lock:
+            if self.state == "running":
+                return
+
+            self.state = "starting"
+            self._ready.clear()
+            log.info(f"[{self.config.name}] Waking backend")
+
+            try:
+                await self.start_backend()
+
+                _deadline = time.monotonic() + self.config.start_timeout
+                while time.monotonic() < _deadline:
+                    if await self.backend_reachable():
+                        self.state = "running"
+                        self.last_activity = time.monotonic()
+                        self._ready.set()
+                        log.info(f"[{self.config.name}] Backend is up")
+                        await self.refresh_status()
+
+                        return
+
+                    await asyncio.sleep(1.0)
+
+                log.error(f"[{self.config.name}] Backend did not come up in {self.config.start_timeout}s")
+            except Exception as exc:
+                log.error(f"[{self.config.name}] Error starting backend. Details: {exc}")
+
+            self.state = "stopped"
+
+    def wake(self) -> asyncio.Task:
+        """Start the backend if it isn't running. Waits for an in-flight stop first."""
+        if self._wake_task is None or self._wake_task.done():
+            self._wake_task = asyncio.create_task(self._wake())
+
+        return self._wake_task
+
+    async def sleep(self) -> None:
+        async with self._control_lock:
+            ## A player may have connected while waiting for the lock
+            if self.state != "running" or self.active_connections:
+                return
+
+            log.info(f"[{self.config.name}] Idle for {self.config.idle_timeout}s, stopping backend")
+            ## Mark stopping before the first await, so a login arriving from here
+            #  on waits to wake the backend instead of being forwarded to it
+            self.state = "stopping"
+            self._ready.clear()
+            await self.refresh_status()
+
+            try:
+                await self.stop_backend()
+            except Exception as exc:
+                log.error(f"[{self.config.name}] Error stopping backend. Details: {exc}")
+                self.state = "running"
+                self._ready.set()
+
+                return
+
+            self.state = "stopped"
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while _data := await reader.read(64 * 1024):
+                writer.write(_data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _forward(
+        self,
+        first_packet: bytes,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        login: bool = True,
+    ) -> None:
+        """Pipe a client connection through to the backend.
+
+        Only login connections keep the backend awake: they count as active
+        connections and reset the idle clock when they end. Status pings from
+        server lists & uptime monitors don't, or they'd keep it up forever.
+        """
+        if login:
+            ## Counted before connecting, so a sleep() while connecting sees it
+            self.active_connections += 1
+
+        try:
+            _backend_reader, _backend_writer = await asyncio.open_connection(
+                self.config.backend_host, self.config.backend_port
+            )
+            _backend_writer.write(first_packet)
+            await _backend_writer.drain()
+
+            await asyncio.gather(
+                self._pipe(reader, _backend_writer),
+                self._pipe(_backend_reader, writer),
+            )
+        finally:
+            if login:
+                self.active_connections -= 1
+                self.last_activity = time.monotonic()
+
+    async def _answer_status(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        ## Status request (0x00), then an optional ping (0x01) to echo back
+        await read_packet(reader)
+        writer.write(encode_packet(0x00, encode_string(json.dumps(self.sleeping_status()))))
+        await writer.drain()
+
+        try:
+            _, _body = await asyncio.wait_for(read_packet(reader), 5.0)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return
+
+        _packet_id, _offset = decode_varint(_body)
+        if _packet_id == 0x01:
+            writer.write(encode_packet(0x01, _body[_offset:]))
+            await writer.drain()
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            _raw, _body = await asyncio.wait_for(read_packet(reader), 10.0)
+            _, _, _, _next_state = parse_handshake(_body)
+
+            if self.state == "running":
+                await self._forward(
+                    _raw, reader, writer, login=_next_state == STATE_LOGIN
+                )
+                return
+
+            if _next_state == STATE_STATUS:
+                await self._answer_status(reader, writer)
+                return
+
+            if _next_state == STATE_LOGIN:
+                self.wake()
+                try:
+                    await asyncio.wait_for(self._ready.wait(), self.config.hold_login)
+                except asyncio.TimeoutError:
+                    _message = json.dumps({"text": self.config.starting_message})
+                    writer.write(encode_packet(0x00, encode_string(_message)))
+                    await writer.drain()
+                    return
+
+                await self._forward(_raw, reader, writer)
+        except (
+            asyncio.IncompleteReadError,
+            asyncio.TimeoutError,
+            OSError,
+            ProtocolError,
+        ) as exc:
+            log.debug(f"[{self.config.name}] Dropped client connection. Details: {exc}")
+        finally:
+            writer.close()
+
+    async def _idle_monitor(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.check_interval)
+
+            _idle_for = time.monotonic() - self.last_activity
+            if (
+                self.state == "running"
+                and self.active_connections == 0
+                and _idle_for >= self.config.idle_timeout
+            ):
+                await self.sleep()
+
+    async def start(self) -> None:
+        """Start listening. Detects whether the backend is already running."""
+        if await self.backend_reachable():
+            self.state = "running"
+            self._ready.set()
+            await self.refresh_status()
+
+        self._server = await asyncio.start_server(
+            self.handle_client, self.config.listen_host, self.config.listen_port
+        )
+        self._monitor_task = asyncio.create_task(self._idle_monitor())
+
+        log.info(
+            f"[{self.config.name}] Proxy listening on {self.config.listen_host}:{self.config.listen_port} -> {self.config.backend_host}:{self.config.backend_port} (backend {self.state})"
+        )
+
+    async def close(self) -> None:
+        if self._monitor_task:
+            self._monitor_task.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+
+async def run_proxies(configs: list[SleepProxyConfig]) -> None:
+    """Run a sleep proxy for every config until cancelled."""
+    await asyncio.gather(*(SleepProxy(c).serve_forever() for c in configs))
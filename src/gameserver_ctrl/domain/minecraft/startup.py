@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from typing import Awaitable, Callable
+
+from .performance import JVM_OVERHEAD_FACTOR
+from .server_gen import MCForgeServer
+
+from loguru import logger as log
+from pydantic import BaseModel, Field
+
+## Async callable that returns True once a job's server is healthy
+HealthProbe = Callable[["StartupJob"], Awaitable[bool]]
+
+_MEMORY_PATTERN: re.Pattern = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*$", re.I)
+_MEMORY_UNITS_MB: dict[str, float] = {
+    "": 1 / 1024**2,
+    "K": 1 / 1024,
+    "M": 1,
+    "G": 1024,
+    "T": 1024**2,
+}
+
+
+def parse_memory_mb(memory: str | None, default: int = 1024) -> int:
+    """Parse a JVM/Docker memory string like "4096M" or "4G" into MB."""
+    if not memory:
+        return default
+
+    _match = _MEMORY_PATTERN.match(memory)
+    if not _match:
+        raise ValueError(f"Could not parse memory value: {memory}")
+
+    return int(float(_match.group(1)) * _MEMORY_UNITS_MB[_match.group(2).upper()])
+
+
+class BootCostModel(BaseModel):
+    """Estimate of how many CPU cores a server uses while it boots.
+
+    Units are CPU cores, the same units as StartupScheduler's cpu_budget (which
+    defaults to os.cpu_count()). A booting JVM keeps about one core busy
+    loading classes & generating spawn chunks, plus JIT & GC threads. Mod
+    loading is mostly single-threaded, so mods add a little, up to max_cores.
+    Player count doesn't matter until players can join.
+
+    Params:
+    -------
+
+    base_cores (float): Cores used booting a server with no mods
+    per_mod_cores (float): Cores added per installed mod
+    max_cores (float): Most cores one boot is assumed to use
+    """
+
+    base_cores: float | None = Field(default=1.0)
+    per_mod_cores: float | None = Field(default=0.005)
+    max_cores: float | None = Field(default=2.0)
+
+
+def estimate_boot_cpu(
+    server: MCForgeServer, cost_model: BootCostModel | None = None
+) -> float:
+    """Estimate the CPU cores a server uses while booting, see BootCostModel."""
+    cost_model = cost_model or BootCostModel()
+
+    return min(
+        cost_model.base_cores + server.mod_count * cost_model.per_mod_cores,
+        cost_model.max_cores,
+    )
+
+
+class StartupJob(BaseModel):
+    """One server to boot.
+
+    Params:
+    -------
+
+    name (str): Server name
+    container_name (str): Docker container name, used by the default health probe
+    priority (int): Higher priorities are booted first
+    cpu_cost (float): CPU cores held while the server boots
+    memory_mb (int): Memory budget held while the server boots
+    start_cmd (list[str]): Command that starts the server and returns
+    workdir (str): Directory start_cmd runs in
+    health_timeout (float): Seconds from admission for start_cmd to finish and
+        the server to become healthy
+    """
+
+    name: str
+    container_name: str | None = Field(default=None)
+    priority: int | None = Field(default=0)
+    cpu_cost: float | None = Field(default=1.0)
+    memory_mb: int | None = Field(default=0)
+    start_cmd: list[str] | None = Field(default_factory=list)
+    workdir: str | None = Field(default=None)
+    health_timeout: float | None = Field(default=300.0)
+
+
+class StartupResult(BaseModel):
+    """Outcome of booting one StartupJob.
+
+    Params:
+    -------
+
+    name (str): Server name
+    status (str): "healthy", "failed" (start_cmd exited non-zero, or didn't
+        finish within health_timeout), or "timeout" (never became healthy)
+    waited (float): Seconds the job waited in the queue before admission
+    boot_time (float): Seconds from admission until healthy (or giving up)
+    detail (str): Error output for failed jobs
+    """
+
+    name: str
+    status: str
+    waited: float | None = Field(default=0.0)
+    boot_time: float | None = Field(default=0.0)
+    detail: str | None = Field(default=None)
+
+
+async def docker_health_probe(job: StartupJob) -> bool:
+    """Return True if the job's container reports a "healthy" healthcheck status."""
+    _proc = await asyncio.create_subprocess_exec(
+        "docker",
+        "inspect",
+        "--format",
+        "{{.State.Health.Status}}",
+        job.container_name or job.name,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        _stdout, _ = await _proc.communicate()
+    except asyncio.CancelledError:
+        ## Timed out by the scheduler, don't leave a hung `docker inspect` behind
+        _proc.kill()
+        raise
+
+    return _proc.returncode == 0 and _stdout.decode().strip() == "healthy"
+
+
+class StartupScheduler:
+    """Admission-controlled scheduler that staggers server boots.
+
+    Jobs are admitted in priority order (highest first, then by name) while
+    the CPU & memory they need fit in what's left of the budgets. Each booting
+    job holds its share of the budgets until its health probe passes (or it
+    fails/times out), then the next job is admitted. Admission is strict, so
+    a big high-priority job is never starved by smaller ones behind it. A job
+    bigger than the whole budget is admitted alone.
+
+    Params:
+    -------
+
+    cpu_budget (float): CPU cores available for booting servers at once.
+        Defaults to the number of CPUs
+    memory_budget_mb (int): Memory available for booting servers at once.
+        None means memory is not limited
+    max_concurrent (int): Hard cap on concurrent boots. None means no cap
+    health_probe (HealthProbe): Async callable, defaults to docker_health_probe
+    poll_interval (float): Seconds between health probes
+    """
+
+    def __init__(
+        self,
+        cpu_budget: float | None = None,
+        memory_budget_mb: int | None = None,
+        max_concurrent: int | None = None,
+        health_probe: HealthProbe | None = None,
+        poll_interval: float = 5.0,
+    ) -> None:
+        """Create a scheduler with nothing booting."""
+        self.cpu_budget: float = cpu_budget or float(os.cpu_count() or 1)
+        self.memory_budget_mb: int | None = memory_budget_mb
+        self.max_concurrent: int | None = max_concurrent
+        self.health_probe: HealthProbe = health_probe or docker_health_probe
+        self.poll_interval: float = poll_interval
+
+        self._cpu_in_use: float = 0.0
+        self._memory_in_use: int = 0
+        self._booting: int = 0
+
+    def _fits(self, job: StartupJob) -> bool:
+        if self._booting == 0:
+            return True
+        if self.max_concurrent is not None and self._booting >= self.max_concurrent:
+            return False
+        if self._cpu_in_use + job.cpu_cost > self.cpu_budget:
+            return False
+        if (
+            self.memory_budget_mb is not None
+            and self._memory_in_use + job.memory_mb > self.memory_budget_mb
+        ):
+            return False
+
+        return True
+
+    async def _start(self, job: StartupJob, timeout: float) -> str | None:
+        """Run start_cmd. Returns error output if it failed or timed out, else None."""
+        if not job.start_cmd:
+            return None
+
+        _proc = await asyncio.create_subprocess_exec(
+            *job.start_cmd,
+            cwd=job.workdir,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            ## A hung start (i.e. a stuck image pull) must not hold the budgets
+            _, _stderr = await asyncio.wait_for(_proc.communicate(), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            _proc.kill()
+            await _proc.wait()
+
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+
+            return f"Start command did not finish within {timeout:.1f}s"
+
+        if _proc.returncode != 0:
+            return f"Exit code {_proc.returncode}: {_stderr.decode().strip()}"
+
+        return None
+
+    async def _boot(self, job: StartupJob, waited: float) -> StartupResult:
+        _start = time.monotonic()
+        _deadline = _start + job.health_timeout
+        log.info(f"[{job.name}] Starting (priority {job.priority})")
+
+        try:
+            _error = await self._start(job, timeout=job.health_timeout)
+        except OSError as exc:
+            _error = str(exc)
+
+        if _error:
+            log.error(f"[{job.name}] Failed to start. Details: {_error}")
+            return StartupResult(
+                name=job.name,
+                status="failed",
+                waited=waited,
+                boot_time=time.monotonic() - _start,
+                detail=_error,
+            )
+
+        while time.monotonic() < _deadline:
+            try:
+                ## A hung probe must not hold the job past its health_timeout
+                _healthy = await asyncio.wait_for(
+                    self.health_probe(job), _deadline - time.monotonic()
+                )
+            except Exception as exc:
+                log.debug(f"[{job.name}] Health probe error, retrying. Details: {exc}")
+                _healthy = False
+
+            if _healthy:
+                _boot_time = time.monotonic() - _start
+                log.info(f"[{job.name}] Healthy after {_boot_time:.1f}s")
+
+                return StartupResult(
+                    name=job.name, status="healthy", waited=waited, boot_time=_boot_time
+                )
+
+            await asyncio.sleep(
+                max(min(self.poll_interval, _deadline - time.monotonic()), 0)
+            )
+
+        log.warning(f"[{job.name}] Not healthy after {job.health_timeout}s")
+
+        return StartupResult(
+            name=job.name,
+            status="timeout",
+            waited=waited,
+            boot_time=time.monotonic() - _start,
+        )
+
+    async def run(self, jobs: list[StartupJob]) -> list[StartupResult]:
+        """Boot every job, returning results in the order jobs finished booting."""
+        _queue = sorted(jobs, key=lambda j: (-j.priority, j.name))
+        _running: dict[asyncio.Task, StartupJob] = {}
+        _results: list[StartupResult] = []
+        _queued_at = time.monotonic()
+
+        while _queue or _running:
+            while _queue and self._fits(_queue[0]):
+                _job = _queue.pop(0)
+                self._cpu_in_use += _job.cpu_cost
+                self._memory_in_use += _job.memory_mb
+                self._booting += 1
+
+                _task = asyncio.create_task(
+                    self._boot(_job, waited=time.monotonic() - _queued_at)
+                )
+                _running[_task] = _job
+
+            _done, _ = await asyncio.wait(
+                _running.keys(), return_when=asyncio.FIRST_COMPLETED
+            )
+            for _task in _done:
+                _job = _running.pop(_task)
+                self._cpu_in_use -= _job.cpu_cost
+                self._memory_in_use -= _job.memory_mb
+                self._booting -= 1
+                _results.append(_task.result())
+
+        return _results
+
+
+def jobs_from_servers(
+    servers: list[MCForgeServer],
+    health_timeout: float = 300.0,
+    cost_model: BootCostModel | None = None,
+) -> list[StartupJob]:
+    """Build StartupJobs that `docker compose up -d` each generated server.
+
+    CPU cost comes from estimate_boot_cpu(), memory from the server's rendered
+    MEMORY setting plus JVM overhead.
+    """
+    _jobs: list[StartupJob] = []
+
+    for _server in servers:
+        _env_data = _server.env_file.env_data if _server.env_file else None
+
+        _jobs.append(
+            StartupJob(
+                name=_server.name,
+                container_name=_env_data.container_name if _env_data else None,
+                priority=_server.startup_priority,
+                cpu_cost=estimate_boot_cpu(_server, cost_model),
+                memory_mb=int(
+                    parse_memory_mb(_env_data.memory if _env_data else None)
+                    * JVM_OVERHEAD_FACTOR
+                ),
+                start_cmd=["docker", "compose", "up", "-d"],
+                workdir=_server.output_dir,
+                health_timeout=health_timeout,
+            )
+        )
+
+    return _jobs
+
+
+def start_fleet(
+    servers: list[MCForgeServer], scheduler: StartupScheduler | None = None
+) -> list[StartupResult]:
+    """Boot generated servers with staggered admission. Blocks until done."""
+    return asyncio.run((scheduler or StartupScheduler()).run(jobs_from_servers(servers)))
@@ -0,0 +1,349 @@
+"""Watch templates & a fleet manifest, re-rendering only the outputs a change affects.
+
+Run from the src/ directory:
+
+    python -m gameserver_ctrl.domain.minecraft.watch fleet.yml
+"""
+from __future__ import annotations
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+from pathlib import Path
+import select
+import struct
+import sys
+import time
+
+from .loaders import load_servers
+from .server_gen import MCForgeServer, mc_templates_dir
+
+from loguru import logger as log
+from pydantic import ValidationError
+import yaml
+
+## inotify event flags, from <sys/inotify.h>
+IN_MODIFY: int = 0x00000002
+IN_CLOSE_WRITE: int = 0x00000008
+IN_MOVED_TO: int = 0x00000080
+IN_CREATE: int = 0x00000100
+IN_DELETE: int = 0x00000200
+IN_ISDIR: int = 0x40000000
+IN_NONBLOCK: int = 0o4000
+IN_CLOEXEC: int = 0o2000000
+WATCH_MASK: int = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+## Output kinds re-rendered when a server's top-level fields (name, paths) change
+ALL_KINDS: tuple[str, ...] = ("env", "whitelist", "compose", "script")
+
+
+class InotifyWatcher:
+    """Watch paths for changes with Linux inotify (via ctypes).
+
+    Directories are watched recursively. For a file, its parent directory is
+    watched (non-recursively), which also catches editors that save by
+    replacing the file. Raises OSError if inotify is unavailable, so callers
+    can fall back to PollingWatcher.
+    """
+
+    def __init__(self, paths: list[Path]) -> None:
+        """Open an inotify instance & add watches for paths."""
+        _libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or not _libc_name:
+            raise OSError("inotify is only available on Linux")
+
+        self._libc = ctypes.CDLL(_libc_name, use_errno=True)
+        self._fd: int = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._dirs: dict[int, Path] = {}
+        ## Watch descriptors of directories whose new subdirectories get watched too
+        self._recursive: set[int] = set()
+        for _path in paths:
+            if _path.is_dir():
+                self._add_tree(_path)
+            else:
+                self._add_watch(_path.parent)
+
+    def _add_watch(self, directory: Path, recursive: bool = False) -> None:
+        _wd = self._libc.inotify_add_watch(
+            self._fd, str(directory).encode(), WATCH_MASK
+        )
+        if _wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {directory}")
+
+        self._dirs[_wd] = directory
+        if recursive:
+            self._recursive.add(_wd)
+
+    def _add_tree(self, root: Path) -> None:
+        self._add_watch(root, recursive=True)
+        for _dirpath, _dirnames, _ in os.walk(root):
+            for _dirname in _dirnames:
+                self._add_watch(Path(_dirpath) / _dirname, recursive=True)
+
+    def wait(self, timeout: float | None = None) -> set[Path]:
+        """Block up to timeout seconds; return paths changed since the last call."""
+        _ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not _ready:
+            return set()
+
+        _changed: set[Path] = set()
+        try:
+            _buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return _changed
+
+        _offset = 0
+        while _offset < len(_buf):
+            _wd, _mask, _, _len = _EVENT_HEADER.unpack_from(_buf, _offset)
+            _offset += _EVENT_HEADER.size
+            _name = _buf[_offset : _offset + _len].rstrip(b"\0").decode()
+            _offset += _len
+
+            _dir = self._dirs.get(_wd)
+            if _dir is None:
+                continue
+
+            _path = _dir / _name if _name else _dir
+            if _mask & IN_ISDIR and _mask & IN_CREATE and _wd in self._recursive:
+                ## Start watching new subdirectories too
+                self._add_tree(_path)
+            _changed.add(_path)
+
+        return _changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Fallback watcher that compares file mtimes every `interval` seconds."""
+
+    def __init__(self, paths: list[Path], interval: float = 1.0) -> None:
+        """Record the current mtimes of every file under paths."""
+        self.paths: list[Path] = paths
+        self.interval: float = interval
+        self._mtimes: dict[Path, int] = self._scan()
+
+    def _scan(self) -> dict[Path, int]:
+        _mtimes: dict[Path, int] = {}
+        for _path in self.paths:
+            _files = _path.rglob("*") if _path.is_dir() else [_path]
+            for _file in _files:
+                try:
+                    _mtimes[_file] = _file.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+
+        return _mtimes
+
+    def wait(self, timeout: float | None = None) -> set[Path]:
+        time.sleep(min(self.interval, timeout) if timeout is not None else self.interval)
+
+        _mtimes = self._scan()
+        _changed = {
+            p for p in _mtimes.keys() | self._mtimes.keys()
+            if _mtimes.get(p) != self._mtimes.get(p)
+        }
+        self._mtimes = _mtimes
+
+        return _changed
+
+    def close(self) -> None:
+        pass
+
+
+def create_watcher(
+    paths: list[Path], force_polling: bool = False, poll_interval: float = 1.0
+) -> InotifyWatcher | PollingWatcher:
+    """Return an inotify watcher, or a polling watcher if inotify is unavailable."""
+    if not force_polling:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError) as exc:
+            log.warning(f"inotify unavailable, falling back to polling. Details: {exc}")
+
+    return PollingWatcher(paths, interval=poll_interval)
+
+
+def server_input_hashes(server: MCForgeServer) -> dict[str, str]:
+    """Hash the inputs that feed each of a server's output kinds.
+
+    Each kind is keyed by its file's render_key (the key RenderCache
+    deduplicates by) plus the path it's written to, so an output that is
+    moved or renamed is re-rendered too.
+    """
+    _dir = f"{server.output_path}/{server.name}"
+
+    return {
+        _kind: f"{_file.render_key}:{_dir}/{_file.filename}"
+        for _kind, _file in server.server_files.items()
+    }
+
+
+def load_manifest(manifest_path: str | Path) -> list[MCForgeServer]:
+    """Load a fleet manifest: a YAML list of MCForgeServer dicts, or {"servers": [...]}."""
+    with open(manifest_path) as _manifest:
+        _data = yaml.safe_load(_manifest) or []
+
+    if isinstance(_data, dict):
+        _data = _data.get("servers") or []
+
+    return load_servers(_data)
+
+
+class FleetWatcher:
+    """Re-render a fleet's outputs whenever its templates or manifest change.
+
+    The watcher keeps two indexes: which template file feeds which (server,
+    output kind) pairs, and a hash of each server's inputs per output kind. A
+    template edit re-renders only that kind of output for the servers that use
+    the template. A manifest edit re-renders only the kinds whose inputs
+    changed, for only the servers that changed.
+
+    Params:
+    -------
+
+    manifest_path (str): Fleet manifest file, see load_manifest()
+    templates_dir (str): Template directory to watch
+    debounce (float): Seconds to wait for a burst of changes to settle
+    force_polling (bool): Use the polling watcher even if inotify is available
+    """
+
+    def __init__(
+        self,
+        manifest_path: str | Path,
+        templates_dir: str | Path = mc_templates_dir,
+        debounce: float = 0.25,
+        force_polling: bool = False,
+    ) -> None:
+        """Set up the watcher. Call run() to render the fleet & start watching."""
+        self.manifest_path: Path = Path(manifest_path).resolve()
+        self.templates_dir: Path = Path(templates_dir).resolve()
+        self.debounce: float = debounce
+        self.force_polling: bool = force_polling
+
+        self.servers: dict[str, MCForgeServer] = {}
+        self._hashes: dict[str, dict[str, str]] = {}
+        self._template_deps: dict[Path, set[tuple[str, str]]] = {}
+
+    def _index(self) -> None:
+        self._hashes = {n: server_input_hashes(s) for n, s in self.servers.items()}
+        self._template_deps = {}
+
+        for _name, _server in self.servers.items():
+            for _kind, _file in _server.server_files.items():
+                _template = Path(_file.template_path).resolve()
+                self._template_deps.setdefault(_template, set()).add((_name, _kind))
+
+    def _render(self, targets: dict[str, set[str]]) -> None:
+        for _name, _kinds in targets.items():
+            _server = self.servers[_name]
+
+            if not Path(_server.output_dir).exists():
+                _server.create_server()
+            else:
+                _server.render_files(kinds=sorted(_kinds))
+
+            log.info(f"[{_name}] Rendered: {', '.join(sorted(_kinds))}")
+
+    def render_all(self) -> None:
+        self.servers = {s.name: s for s in load_manifest(self.manifest_path)}
+        self._index()
+        self._render({n: set(ALL_KINDS) for n in self.servers})
+
+    def _manifest_changes(self) -> dict[str, set[str]]:
+        try:
+            _servers = {s.name: s for s in load_manifest(self.manifest_path)}
+        except (OSError, yaml.YAMLError, ValidationError) as exc:
+            log.error(f"Could not reload manifest, keeping previous fleet. Details: {exc}")
+            return {}
+
+        for _removed in self.servers.keys() - _servers.keys():
+            log.warning(
+                f"[{_removed}] Removed from manifest. Its output dir is left in place."
+            )
+
+        _targets: dict[str, set[str]] = {}
+        for _name, _server in _servers.items():
+            _new = server_input_hashes(_server)
+            _old = self._hashes.get(_name, {})
+            _kinds = {k for k, h in _new.items() if _old.get(k) != h}
+            if _kinds:
+                _targets[_name] = _kinds
+
+        self.servers = _servers
+        self._index()
+
+        return _targets
+
+    def handle_changes(self, paths: set[Path]) -> dict[str, set[str]]:
+        """Re-render outputs affected by changed paths. Returns {server: kinds}."""
+        _targets: dict[str, set[str]] = {}
+        _paths = {p.resolve() for p in paths}
+
+        if self.manifest_path in _paths:
+            _targets = self._manifest_changes()
+
+        for _path in _paths:
+            for _name, _kind in self._template_deps.get(_path, ()):
+                _targets.setdefault(_name, set()).add(_kind)
+
+        if _targets:
+            _start = time.perf_counter()
+            self._render(_targets)
+            log.info(
+                f"Re-rendered [{len(_targets)}] server(s) in {time.perf_counter() - _start:.3f}s"
+            )
+
+        return _targets
+
+    def run(self) -> None:
+        """Render everything once, then re-render on changes until interrupted."""
+        self.render_all()
+
+        _watcher = create_watcher(
+            [self.templates_dir, self.manifest_path],
+            force_polling=self.force_polling,
+        )
+        log.info(f"Watching {self.templates_dir} and {self.manifest_path}")
+
+        try:
+            while True:
+                _changed = _watcher.wait()
+                if not _changed:
+                    continue
+
+                ## Debounce: keep collecting until changes stop for `debounce` seconds
+                while True:
+                    _more = _watcher.wait(timeout=self.debounce)
+                    if not _more:
+                        break
+                    _changed |= _more
+
+                self.handle_changes(_changed)
+        except KeyboardInterrupt:
+            log.info("Stopping watch mode")
+        finally:
+            _watcher.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("manifest", help="Fleet manifest (YAML list of servers)")
+    parser.add_argument("--templates-dir", default=mc_templates_dir)
+    parser.add_argument("--debounce", type=float, default=0.25)
+    parser.add_argument("--poll", action="store_true", help="Force polling watcher")
+    args = parser.parse_args()
+
+    FleetWatcher(
+        args.manifest,
+        templates_dir=args.templates_dir,
+        debounce=args.debounce,
+        force_polling=args.poll,
+    ).run()
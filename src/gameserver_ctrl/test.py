@@ -16,6 +16,7 @@ from gameserver_ctrl.domain.minecraft import (
     MCForgeServer,
     WhitelistFile,
     WhitelistPlayer,
+    load_whitelist_players,
 )
 
 from dynaconf import settings
@@ -24,23 +25,21 @@ from red_utils.ext.loguru_utils import LoguruSinkStdOut, init_logger
 
 def create_test_whitelist(create_player_count: int = 3) -> WhitelistFile:
     test_player_dicts: list[dict] = []
-    test_players: list[WhitelistPlayer] = []
 
     while create_player_count > 0:
         player_dict: dict = {"id": str(uuid4()), "name": f"test{create_player_count}"}
         test_player_dicts.append(player_dict)
 
-        player: WhitelistPlayer = WhitelistPlayer.model_validate(player_dict)
-        test_players.append(player)
-
         create_player_count -= 1
 
+    test_players: list[WhitelistPlayer] = load_whitelist_players(test_player_dicts)
+
     log.debug(f"Created [{len(test_players)}] test players.")
     if len(test_players) > 0:
         for p in test_players:
             log.debug(f"\tPlayer: {p}")
 
-    whitelist: WhitelistFile = WhitelistFile(players=test_players)
+    whitelist: WhitelistFile = WhitelistFile(whitelist_players=test_players)
 
     return whitelist
 
@@ -1,3 +1,3 @@
 from __future__ import annotations
 
-from . import jinja_utils
+from . import jinja_utils, output_utils, profile_utils
@@ -3,6 +3,7 @@ from __future__ import annotations
 from . import operations
 from .operations import (
     create_loader_env,
+    get_dir_env,
     get_template_from_env,
     load_template_dir,
     render_template_to_file,
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from functools import lru_cache
+import os
 from typing import Optional
 
 from jinja2 import Environment, FileSystemLoader, Template
@@ -37,6 +39,17 @@ def create_loader_env(_loader: FileSystemLoader = None) -> Environment:
     return _env
 
 
+@lru_cache(maxsize=None)
+def get_dir_env(template_dir_path: str) -> Environment:
+    """Return a shared jinja2.Environment for the directory template_dir_path.
+
+    An Environment caches the templates it compiles, so sharing one per
+    directory compiles each template once instead of on every render. Jinja's
+    auto_reload still re-reads a template whose file has changed.
+    """
+    return create_loader_env(_loader=load_template_dir(template_dir_path))
+
+
 def get_template_from_env(
     templ_env: Environment = None, templ_file: str = None
 ) -> Template:
@@ -52,5 +65,10 @@ def render_template_to_file(
 ) -> None:
     log.debug(f"Rendering to [{_outfile}]")
 
-    with open(_outfile, "w") as _out:
+    ## Write to a temp file & swap it in, so a render replaces the file instead
+    #  of writing through to other hardlinks of it (see RenderCache)
+    _tmpfile = f"{_outfile}.tmp"
+    with open(_tmpfile, "w") as _out:
         _out.write(_render)
+
+    os.replace(_tmpfile, _outfile)
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from . import backends
+from .backends import (
+    FileSystemBackend,
+    OutputBackend,
+    TarArchiveBackend,
+    ZipArchiveBackend,
+    file_mode,
+    open_backend,
+)
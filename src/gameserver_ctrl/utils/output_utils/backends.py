@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import io
+from pathlib import Path
+import sys
+import tarfile
+import time
+from typing import BinaryIO
+import zipfile
+
+from gameserver_ctrl.utils import jinja_utils
+
+from loguru import logger as log
+
+## File mode for rendered scripts, everything else is written 0o644
+SCRIPT_SUFFIXES: tuple[str, ...] = (".sh",)
+
+
+def file_mode(path: str) -> int:
+    """Return the permission bits a rendered file at path is written with."""
+    return 0o755 if path.endswith(SCRIPT_SUFFIXES) else 0o644
+
+
+class OutputBackend(ABC):
+    """Destination for rendered template output.
+
+    Paths passed to write_text() and make_dir() are relative, "/"-separated
+    paths, i.e. "example_forge_server/.env". Backends are context managers;
+    archive backends finish writing the archive on close(). Subclasses must
+    implement write_text() and make_dir().
+    """
+
+    @abstractmethod
+    def write_text(self, path: str, content: str) -> None:
+        """Write content to the file at path, with the mode from file_mode()."""
+
+    @abstractmethod
+    def make_dir(self, path: str) -> None:
+        """Create the directory at path."""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> OutputBackend:
+        """Return the backend, closing it when the with block exits."""
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Close the backend."""
+        self.close()
+
+
+class FileSystemBackend(OutputBackend):
+    """Write rendered output as loose files under a root directory."""
+
+    def __init__(self, root: str | Path = ".") -> None:
+        """Write files under root."""
+        self.root: Path = Path(root)
+
+    def write_text(self, path: str, content: str) -> None:
+        _outfile = self.root / path
+        if not _outfile.parent.exists():
+            _outfile.parent.mkdir(parents=True)
+
+        jinja_utils.render_template_to_file(_render=content, _outfile=str(_outfile))
+        _outfile.chmod(file_mode(path))
+
+    def make_dir(self, path: str) -> None:
+        if not (self.root / path).exists():
+            (self.root / path).mkdir(parents=True)
+
+
+def _open_target(target: str | Path | BinaryIO | None) -> tuple[BinaryIO, bool]:
+    """Return (binary file object, whether the backend owns & must close it)."""
+    if target is None:
+        return sys.stdout.buffer, False
+
+    if isinstance(target, (str, Path)):
+        if not Path(target).parent.exists():
+            Path(target).parent.mkdir(parents=True)
+
+        return open(target, "wb"), True
+
+    return target, False
+
+
+class TarArchiveBackend(OutputBackend):
+    """Stream rendered output into a tar archive.
+
+    The archive is written in tarfile's streaming mode ("w|gz"), so the target
+    does not need to be seekable and nothing is staged on disk.
+
+    Params:
+    -------
+
+    target (str | Path | BinaryIO | None): Archive path, a binary file-like
+        object, or None to write to stdout
+    compression (str): "gz", "bz2", "xz", or "" for an uncompressed tar
+    """
+
+    def __init__(
+        self, target: str | Path | BinaryIO | None = None, compression: str = "gz"
+    ) -> None:
+        """Open target & start the tar stream."""
+        self._fileobj, self._owns_fileobj = _open_target(target)
+        self._tar: tarfile.TarFile = tarfile.open(
+            fileobj=self._fileobj, mode=f"w|{compression}"
+        )
+        self._dirs: set[str] = set()
+
+    def write_text(self, path: str, content: str) -> None:
+        _data = content.encode("utf-8")
+
+        _info = tarfile.TarInfo(name=path)
+        _info.size = len(_data)
+        _info.mtime = int(time.time())
+        _info.mode = file_mode(path)
+
+        self._tar.addfile(_info, io.BytesIO(_data))
+
+    def make_dir(self, path: str) -> None:
+        if path in self._dirs:
+            return
+
+        _info = tarfile.TarInfo(name=path)
+        _info.type = tarfile.DIRTYPE
+        _info.mtime = int(time.time())
+        _info.mode = 0o755
+
+        self._tar.addfile(_info)
+        self._dirs.add(path)
+
+    def close(self) -> None:
+        self._tar.close()
+
+        if self._owns_fileobj:
+            self._fileobj.close()
+        else:
+            self._fileobj.flush()
+
+
+class ZipArchiveBackend(OutputBackend):
+    """Stream rendered output into a zip archive.
+
+    zipfile writes data descriptors when the target isn't seekable, so this
+    also works with pipes and stdout.
+
+    Params:
+    -------
+
+    target (str | Path | BinaryIO | None): Archive path, a binary file-like
+        object, or None to write to stdout
+    """
+
+    def __init__(self, target: str | Path | BinaryIO | None = None) -> None:
+        """Open target & start the zip archive."""
+        self._fileobj, self._owns_fileobj = _open_target(target)
+        self._zip: zipfile.ZipFile = zipfile.ZipFile(
+            self._fileobj, mode="w", compression=zipfile.ZIP_DEFLATED
+        )
+
+    def write_text(self, path: str, content: str) -> None:
+        _info = zipfile.ZipInfo(filename=path, date_time=time.localtime()[:6])
+        _info.compress_type = zipfile.ZIP_DEFLATED
+        _info.external_attr = file_mode(path) << 16
+
+        self._zip.writestr(_info, content)
+
+    def make_dir(self, path: str) -> None:
+        self._zip.mkdir(path, mode=0o755)
+
+    def close(self) -> None:
+        self._zip.close()
+
+        if self._owns_fileobj:
+            self._fileobj.close()
+        else:
+            self._fileobj.flush()
+
+
+def open_backend(
+    target: str | Path | BinaryIO | None = None, archive_format: str | None = None
+) -> OutputBackend:
+    """Create an archive backend for target.
+
+    archive_format is one of "tar.gz", "tar", or "zip". If it is not given, it
+    is inferred from the target's file extension. Streams and stdout default
+    to "tar.gz".
+    """
+    if archive_format is None:
+        _name = str(target) if isinstance(target, (str, Path)) else ""
+
+        if _name.endswith(".zip"):
+            archive_format = "zip"
+        elif _name.endswith(".tar"):
+            archive_format = "tar"
+        else:
+            archive_format = "tar.gz"
+
+    log.debug(f"Opening [{archive_format}] output backend for: {target or 'stdout'}")
+
+    match archive_format:
+        case "tar.gz" | "tgz":
+            return TarArchiveBackend(target, compression="gz")
+        case "tar":
+            return TarArchiveBackend(target, compression="")
+        case "zip":
+            return ZipArchiveBackend(target)
+        case _:
+            raise ValueError(f"Unsupported archive format: {archive_format}")
@@ -0,0 +1,4 @@
+from __future__ import annotations
+
+from . import memory
+from .memory import AllocationSite, MemoryProfiler, StageReport, profile_stage
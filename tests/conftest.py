@@ -0,0 +1,37 @@
+"""Run tests from src/, where the app's config/ & templates/ dirs live.
+
+Tests marked slow (i.e. the memory budget scenarios) only run when pytest is
+passed --run-slow.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import sys
+
+import pytest
+
+SRC_DIR: Path = Path(__file__).resolve().parent.parent / "src"
+
+sys.path.insert(0, str(SRC_DIR))
+os.chdir(SRC_DIR)
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption("--run-slow", action="store_true", help="Also run slow tests")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line("markers", "slow: slow test, only run with --run-slow")
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: list[pytest.Item]
+) -> None:
+    if config.getoption("--run-slow"):
+        return
+
+    _skip = pytest.mark.skip(reason="slow test, run with --run-slow")
+    for _item in items:
+        if "slow" in _item.keywords:
+            _item.add_marker(_skip)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import os
+
+from gameserver_ctrl.domain.minecraft.log_analyzer import (
+    LogAnalyzer,
+    LogEvent,
+    LogOffsetStore,
+    RingBuffer,
+    parse_line,
+)
+
+import pytest
+
+def lag_line(clock: str, ms: int = 2500) -> str:
+    return f"[{clock}] [Server thread/WARN]: Can't keep up! Is the server overloaded? Running {ms}ms or {ms // 50} ticks behind"
+
+
+@pytest.fixture
+def analyzer(tmp_path) -> LogAnalyzer:
+    return LogAnalyzer(offset_store=LogOffsetStore(tmp_path / "offsets.json"))
+
+
+def test_parse_line_events():
+    assert parse_line("s1", lag_line("12:00:01")) == LogEvent(
+        "s1", "lag", "50", 2500, 12 * 3600 + 1
+    )
+    assert parse_line(
+        "s1", "[12:00:00] [Server thread/INFO]: Steve joined the game"
+    ) == LogEvent("s1", "join", "Steve", 0, 12 * 3600)
+    assert parse_line("s1", "Alex left the game") == LogEvent(
+        "s1", "leave", "Alex", 0, None
+    )
+    assert (
+        parse_line("s1", "[13:00:00] java.lang.OutOfMemoryError: Java heap space").detail
+        == "out_of_memory"
+    )
+    assert parse_line("s1", "[12:00:00] [Server thread/INFO]: Done (3.2s)!") is None
+
+
+def test_parse_line_forge_timestamp():
+    _event = parse_line(
+        "s1", "[19Oct2026 01:02:03.450] [Server thread/INFO] [minecraft/]: Steve joined the game"
+    )
+
+    assert _event.timestamp == pytest.approx(3723.45)
+
+
+def test_ring_buffer_wraps():
+    _buffer = RingBuffer(3)
+    for _value in range(10):
+        _buffer.append(_value)
+
+    assert len(_buffer) == 3
+    assert _buffer.values() == [7, 8, 9]
+    assert _buffer.mean == 8
+    assert _buffer.max == 9
+    assert _buffer.percentile(95) == 9
+
+
+def test_lag_rate_uses_log_timestamps(analyzer):
+    ## 6 warnings spread over 5 hours, ingested all at once
+    for _hour in range(6):
+        analyzer.ingest_line("s1", lag_line(f"{10 + _hour:02d}:00:00"), now=0.0)
+
+    assert analyzer.stats("s1").lag_events_per_hour == pytest.approx(1.0)
+
+
+def test_lag_rate_crosses_midnight(analyzer):
+    for _clock in ["22:00:00", "23:00:00", "00:00:00", "01:00:00"]:
+        analyzer.ingest_line("s1", lag_line(_clock))
+
+    assert analyzer.stats("s1").lag_events_per_hour == pytest.approx(1.0)
+
+
+def test_tail_resumes_from_offset(tmp_path):
+    _log = tmp_path / "latest.log"
+    _log.write_text(
+        "[12:00:00] [Server thread/INFO]: Steve joined the game\n[12:00:01] partial"
+    )
+    _store_path = tmp_path / "offsets.json"
+
+    analyzer = LogAnalyzer(offset_store=LogOffsetStore(_store_path))
+    analyzer.add_source("s1", _log)
+    assert analyzer.poll() == 1
+    assert analyzer.poll() == 0
+
+    with open(_log, "a") as _out:
+        _out.write(" line Alex joined the game\n")
+
+    ## A fresh analyzer picks up from the persisted offset, partial line included
+    resumed = LogAnalyzer(offset_store=LogOffsetStore(_store_path))
+    resumed.add_source("s1", _log)
+    assert resumed.poll() == 1
+    assert resumed.stats("s1").joins == 1
+    assert resumed.stats("s1").players_online == 1
+
+
+def test_tail_restarts_after_rotation(tmp_path, analyzer):
+    _log = tmp_path / "latest.log"
+    _log.write_text("Steve joined the game\nAlex joined the game\n")
+    analyzer.add_source("s1", _log)
+    assert analyzer.poll() == 2
+
+    ## Rotated: a new file (new inode) replaces the old one
+    _rotated = tmp_path / "latest.log.new"
+    _rotated.write_text("Notch joined the game\n")
+    os.replace(_rotated, _log)
+    assert analyzer.poll() == 1
+
+    ## Truncated in place: the file is now shorter than the stored offset
+    _log.write_text("")
+    analyzer.poll()
+    with open(_log, "a") as _out:
+        _out.write("jeb_ joined the game\n")
+    assert analyzer.poll() == 1
+    assert analyzer.stats("s1").joins == 4
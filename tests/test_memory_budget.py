@@ -0,0 +1,33 @@
+"""Fail when a synthetic large-fleet run peaks over its recorded memory budget.
+
+Budgets live in src/gameserver_ctrl/benchmarks/memory_budgets.json. After an
+intended change in memory use, re-record them from src/ with:
+
+    python -m gameserver_ctrl.benchmarks.memory_budget --record
+
+The scenarios run under tracemalloc, so they are marked slow. Run them with:
+
+    pytest --run-slow tests/test_memory_budget.py
+"""
+from __future__ import annotations
+
+from gameserver_ctrl.benchmarks.memory_budget import SCENARIOS, load_budgets
+
+import pytest
+
+@pytest.mark.slow
+@pytest.mark.parametrize("scenario", ["1k-servers", "100k-players"])
+def test_peak_memory_within_budget(scenario: str):
+    _budgets = load_budgets().get(scenario, {})
+    profiler = SCENARIOS[scenario]()
+
+    assert profiler.reports, f"[{scenario}] No stages were profiled"
+    for _report in profiler.reports:
+        assert _report.name in _budgets, (
+            f"[{scenario}] No budget recorded for stage [{_report.name}]"
+        )
+        assert _report.peak_bytes <= _budgets[_report.name], (
+            f"[{scenario}] Stage [{_report.name}] peaked at {_report.peak_mb:.2f} MB, "
+            f"over its {_budgets[_report.name] / 1024**2:.2f} MB budget\n"
+            f"{_report.summary()}"
+        )
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import io
+import json
+import zipfile
+
+from gameserver_ctrl.domain.minecraft.mod_index import ModIndex, in_maven_range
+
+import pytest
+
+def forge_jar(mod_id: str, version: str, dependencies: str = "") -> bytes:
+    _toml = f"""modLoader="javafml"
+loaderVersion="[47,)"
+
+[[mods]]
+modId="{mod_id}"
+version="{version}"
+{dependencies}
+"""
+    _buffer = io.BytesIO()
+    with zipfile.ZipFile(_buffer, "w") as _jar:
+        _jar.writestr("META-INF/mods.toml", _toml)
+
+    return _buffer.getvalue()
+
+
+def fabric_jar(data: dict, bundled: dict[str, bytes] | None = None) -> bytes:
+    _buffer = io.BytesIO()
+    with zipfile.ZipFile(_buffer, "w") as _jar:
+        _jar.writestr(
+            "fabric.mod.json",
+            json.dumps({**data, "jars": [{"file": p} for p in (bundled or {})]}),
+        )
+        for _path, _content in (bundled or {}).items():
+            _jar.writestr(_path, _content)
+
+    return _buffer.getvalue()
+
+
+def dependency(owner: str, mod_id: str, **fields) -> str:
+    _fields = "\n".join(f"{k}={json.dumps(v)}" for k, v in fields.items())
+
+    return f'[[dependencies.{owner}]]\nmodId="{mod_id}"\n{_fields}\n'
+
+
+@pytest.fixture
+def check(tmp_path):
+    def _check(jars: dict[str, bytes], server_type: str = "FORGE", server_ver: str = "1.20.1"):
+        _mods_dir = tmp_path / "mods"
+        _mods_dir.mkdir(exist_ok=True)
+        for _name, _content in jars.items():
+            (_mods_dir / _name).write_bytes(_content)
+
+        with ModIndex(cache_dir=str(tmp_path / "cache")) as _index:
+            _index.scan(_mods_dir)
+            return [
+                (i.severity, i.mod_id, i.message)
+                for i in _index.check(server_type=server_type, server_ver=server_ver)
+            ]
+
+    return _check
+
+
+def test_maven_ranges():
+    assert in_maven_range("1.20.1", "[1.20,1.21)")
+    assert in_maven_range("1.20.1", "[1.20.1]")
+    assert not in_maven_range("1.21", "[1.20,1.21)")
+    assert in_maven_range("47.2.0", "47")
+
+
+def test_missing_and_mismatched_dependencies(check):
+    _issues = check(
+        {
+            "a.jar": forge_jar(
+                "a",
+                "1.0",
+                dependency("a", "b", mandatory=True, versionRange="[2.0,)")
+                + dependency("a", "c", mandatory=True),
+            ),
+            "b.jar": forge_jar("b", "1.5"),
+        }
+    )
+
+    assert ("error", "a", "Requires b [2.0,), found 1.5") in _issues
+    assert ("error", "a", "Missing required dependency: c") in _issues
+
+
+def test_client_side_dependency_not_required_on_server(check):
+    _issues = check(
+        {
+            "a.jar": forge_jar(
+                "a", "1.0", dependency("a", "jei", mandatory=True, side="CLIENT")
+            )
+        }
+    )
+
+    assert _issues == []
+
+
+def test_installed_incompatible_mod_is_an_error(check):
+    _incompatible = dependency("a", "b", type="incompatible", versionRange="[1.0,2.0)")
+
+    assert check(
+        {"a.jar": forge_jar("a", "1.0", _incompatible), "b.jar": forge_jar("b", "1.5")}
+    ) == [("error", "a", "Is incompatible with installed b 1.5")]
+
+
+def test_incompatible_mod_outside_range_is_fine(check):
+    _incompatible = dependency("a", "b", type="incompatible", versionRange="[1.0,2.0)")
+
+    assert check(
+        {"a.jar": forge_jar("a", "1.0", _incompatible), "b.jar": forge_jar("b", "2.1")}
+    ) == []
+
+
+def test_jar_in_jar_and_provides_satisfy_dependencies(check):
+    _api = fabric_jar(
+        {"id": "fabric-api", "version": "0.92.0"},
+        bundled={
+            "META-INF/jars/fabric-api-base.jar": fabric_jar(
+                {"id": "fabric-api-base", "version": "0.4.31"}
+            )
+        },
+    )
+    _aliased = fabric_jar({"id": "cloth-config", "version": "11.1.0", "provides": ["cloth-config2"]})
+    _mod = fabric_jar(
+        {
+            "id": "mymod",
+            "version": "1.0.0",
+            "depends": {
+                "fabric-api-base": ">=0.4",
+                "cloth-config2": "*",
+                "minecraft": "1.20.x",
+            },
+            "breaks": {"optifabric": "*"},
+        }
+    )
+
+    _issues = check(
+        {"api.jar": _api, "cloth.jar": _aliased, "mymod.jar": _mod}, server_type="FABRIC"
+    )
+
+    assert _issues == []
+
+
+def test_duplicates_and_wrong_loader(check):
+    _issues = check(
+        {
+            "a-1.jar": forge_jar("a", "1.0"),
+            "a-2.jar": forge_jar("a", "2.0"),
+            "f.jar": fabric_jar({"id": "f", "version": "1.0"}),
+        }
+    )
+
+    assert ("error", "a", "Installed more than once: a-1.jar (1.0), a-2.jar (2.0)") in _issues
+    assert ("error", "f", "f.jar is a fabric mod, server type is FORGE") in _issues
+
+
+def test_minecraft_version_check(check):
+    _jar = forge_jar(
+        "a", "1.0", dependency("a", "minecraft", mandatory=True, versionRange="[1.19,1.20)")
+    )
+
+    assert check({"a.jar": _jar}) == [
+        ("error", "a", "Requires Minecraft [1.19,1.20), server is 1.20.1")
+    ]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import io
+import stat
+import tarfile
+import zipfile
+
+from gameserver_ctrl.domain.minecraft import MCForgeServer
+from gameserver_ctrl.utils.output_utils import (
+    FileSystemBackend,
+    OutputBackend,
+    TarArchiveBackend,
+    ZipArchiveBackend,
+)
+
+import pytest
+
+class _Unseekable(io.RawIOBase):
+    """Write-only stream that can't seek, like a pipe or stdout."""
+
+    def __init__(self) -> None:
+        """Collect everything written in self.data."""
+        self.data: bytearray = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self.data += b
+        return len(b)
+
+
+def test_backend_missing_method_fails_on_create():
+    class _HalfBackend(OutputBackend):
+        def write_text(self, path: str, content: str) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        _HalfBackend()
+
+
+def test_tar_backend_streams_to_unseekable_target():
+    _target = _Unseekable()
+    with TarArchiveBackend(_target) as _backend:
+        _backend.make_dir("s1")
+        _backend.write_text("s1/recreate_server.sh", "#!/bin/bash\n")
+        _backend.write_text("s1/.env", "A=1\n")
+
+    with tarfile.open(fileobj=io.BytesIO(bytes(_target.data)), mode="r:gz") as _tar:
+        assert _tar.getmember("s1/recreate_server.sh").mode == 0o755
+        assert _tar.getmember("s1/.env").mode == 0o644
+        assert _tar.extractfile("s1/.env").read() == b"A=1\n"
+
+
+def test_zip_backend_streams_to_unseekable_target():
+    _target = _Unseekable()
+    with ZipArchiveBackend(_target) as _backend:
+        _backend.write_text("s1/recreate_server.sh", "#!/bin/bash\n")
+
+    with zipfile.ZipFile(io.BytesIO(bytes(_target.data))) as _zip:
+        assert _zip.getinfo("s1/recreate_server.sh").external_attr >> 16 == 0o755
+
+
+def test_filesystem_backend_writes_modes(tmp_path):
+    _backend = FileSystemBackend(tmp_path)
+    _backend.make_dir("s1/data")
+    _backend.write_text("s1/recreate_server.sh", "#!/bin/bash\n")
+    _backend.write_text("s1/.env", "A=1\n")
+
+    assert (tmp_path / "s1" / "data").is_dir()
+    assert stat.S_IMODE((tmp_path / "s1" / "recreate_server.sh").stat().st_mode) == 0o755
+    assert stat.S_IMODE((tmp_path / "s1" / ".env").stat().st_mode) == 0o644
+    assert (tmp_path / "s1" / ".env").read_text() == "A=1\n"
+
+
+def test_loose_files_use_archive_modes(tmp_path):
+    MCForgeServer(name="s1", output_path=str(tmp_path)).create_server()
+
+    _script = tmp_path / "s1" / "recreate_server.sh"
+    assert stat.S_IMODE(_script.stat().st_mode) == 0o755
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from gameserver_ctrl.domain.minecraft import MCForgeServer
+from gameserver_ctrl.domain.minecraft.performance import (
+    JVM_OVERHEAD_FACTOR,
+    PROFILES,
+    InsufficientMemoryError,
+    apply_profiles,
+    compute_settings,
+    split_host_memory,
+)
+from gameserver_ctrl.domain.minecraft.placement import FleetHost
+from gameserver_ctrl.domain.minecraft.schemas import (
+    ForgeServerEnvData,
+    ForgeServerEnvFile,
+)
+
+import pytest
+
+def make_server(
+    name: str, profile: str = "small-vanilla", mods: int = 0, players: int = 0
+) -> MCForgeServer:
+    return MCForgeServer(
+        name=name,
+        performance_profile=profile,
+        expected_players=players,
+        env_file=ForgeServerEnvFile(
+            env_data=ForgeServerEnvData(
+                modrinth_project_slugs=", ".join(f"mod{i}" for i in range(mods))
+            )
+        ),
+    )
+
+
+def test_heap_rounding_keeps_full_distances():
+    ## Wants a 1760M heap, rounded down to 1536M, but nothing was taken away
+    settings = compute_settings(PROFILES["small-vanilla"], 2, 3)
+
+    assert settings.heap_mb == 1536
+    assert settings.view_distance == 10
+    assert settings.simulation_distance == 8
+
+
+def test_budget_shrinks_heap_and_distances():
+    _profile = PROFILES["small-vanilla"]
+    _want = _profile.wanted_heap_mb(player_count=40)
+
+    settings = compute_settings(
+        _profile, player_count=40, memory_budget_mb=int(_want / 2 * JVM_OVERHEAD_FACTOR)
+    )
+
+    assert settings.container_memory_mb <= _want / 2 * JVM_OVERHEAD_FACTOR
+    assert settings.heap_mb % 256 == 0
+    assert settings.view_distance == 6
+    assert settings.simulation_distance == 4
+
+
+def test_budget_below_profile_minimum_raises():
+    with pytest.raises(InsufficientMemoryError):
+        compute_settings(PROFILES["heavy-modpack"], mod_count=300, memory_budget_mb=960)
+
+
+def test_large_heap_uses_large_heap_gc_flags():
+    settings = compute_settings(PROFILES["heavy-modpack"], mod_count=300, player_count=20)
+
+    assert settings.heap_mb >= 12 * 1024
+    assert "-XX:G1HeapRegionSize=16M" in settings.jvm_xx_opts
+    assert "-XX:G1HeapRegionSize=8M" in compute_settings(
+        PROFILES["small-vanilla"]
+    ).jvm_xx_opts
+
+
+def test_players_step_distances_down():
+    _profile = PROFILES["event"]
+
+    quiet = compute_settings(_profile, player_count=0)
+    busy = compute_settings(_profile, player_count=50)
+
+    assert busy.view_distance == quiet.view_distance - 2
+    assert busy.simulation_distance <= busy.view_distance
+
+
+def test_split_without_host_memory_gives_no_budgets():
+    host = FleetHost(name="a")
+
+    assert split_host_memory(host, [make_server("s1")]) == {"s1": None}
+
+
+def test_split_gives_wanted_memory_when_it_fits():
+    host = FleetHost(name="a", memory_mb=32 * 1024)
+    servers = [make_server("s1"), make_server("s2", players=10)]
+
+    budgets = split_host_memory(host, servers)
+
+    for _server in servers:
+        _want = PROFILES["small-vanilla"].wanted_heap_mb(0, _server.player_count)
+        assert budgets[_server.name] == int(_want * JVM_OVERHEAD_FACTOR)
+
+
+def test_split_scales_down_proportionally_when_overcommitted():
+    host = FleetHost(name="a", memory_mb=8 * 1024, reserved_memory_mb=1024)
+    servers = [make_server("small"), make_server("big", profile="heavy-modpack")]
+
+    budgets = split_host_memory(host, servers)
+
+    assert sum(budgets.values()) <= 7 * 1024
+    assert budgets["big"] > budgets["small"]
+    assert budgets["big"] / budgets["small"] == pytest.approx(4096 / 1536, rel=0.01)
+
+
+def test_apply_profiles_renders_settings_into_copies():
+    servers = [make_server("s1", players=4)]
+    hosts = [FleetHost(name="a", memory_mb=16 * 1024)]
+
+    updated = apply_profiles(servers, hosts=hosts)
+
+    _env_data = updated[0].env_file.env_data
+    assert _env_data.memory == "1792M"
+    assert _env_data.view_distance == 10
+    assert _env_data.jvm_xx_opts.startswith("-XX:+UseG1GC")
+    ## The passed-in servers are not modified
+    assert servers[0].env_file.env_data.memory is None
+
+
+def test_apply_profiles_refuses_host_too_small_for_profile():
+    servers = [make_server("pack", profile="heavy-modpack", mods=300)]
+    hosts = [FleetHost(name="tiny", memory_mb=3 * 1024, reserved_memory_mb=2048)]
+
+    with pytest.raises(InsufficientMemoryError, match="tiny"):
+        apply_profiles(servers, hosts=hosts)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from gameserver_ctrl.domain.minecraft import MCForgeServer
+from gameserver_ctrl.domain.minecraft.placement import (
+    FleetHost,
+    ServerCostModel,
+    estimate_server_cost,
+    generate_host_trees,
+    plan_placement,
+)
+from gameserver_ctrl.domain.minecraft.schemas import (
+    ForgeServerEnvData,
+    ForgeServerEnvFile,
+)
+
+import pytest
+
+## Large enough that no host ever fills, so placement is pure rendezvous hashing
+UNBOUNDED: float = 1_000.0
+
+
+def make_servers(count: int) -> list[MCForgeServer]:
+    return [MCForgeServer(name=f"server_{i}") for i in range(count)]
+
+
+def make_hosts(*names: str) -> list[FleetHost]:
+    return [FleetHost(name=_name) for _name in names]
+
+
+def test_cost_counts_mods_and_players():
+    server = MCForgeServer(
+        name="modded",
+        expected_players=10,
+        env_file=ForgeServerEnvFile(
+            env_data=ForgeServerEnvData(modrinth_project_slugs="jei, journeymap")
+        ),
+    )
+    cost_model = ServerCostModel(base=1.0, per_mod=0.5, per_player=0.1)
+
+    assert estimate_server_cost(server, cost_model) == pytest.approx(3.0)
+
+
+def test_placement_is_deterministic():
+    servers = make_servers(200)
+    hosts = make_hosts("a", "b", "c")
+
+    assert (
+        plan_placement(servers, hosts).assignments
+        == plan_placement(list(reversed(servers)), list(reversed(hosts))).assignments
+    )
+
+
+def test_hosts_are_picked_by_capacity():
+    servers = make_servers(4_000)
+    hosts = [FleetHost(name="small", capacity=1.0), FleetHost(name="large", capacity=3.0)]
+
+    plan = plan_placement(servers, hosts, load_factor=UNBOUNDED)
+
+    _large_share = len(plan.servers_on("large")) / len(servers)
+    assert 0.72 < _large_share < 0.78
+
+
+def test_loads_stay_within_bound():
+    ## Uneven costs, so the bound (not just hashing) decides where servers land
+    servers = [
+        MCForgeServer(name=f"server_{i}", expected_players=i % 50) for i in range(500)
+    ]
+    hosts = [
+        FleetHost(name="a", capacity=1.0),
+        FleetHost(name="b", capacity=2.0),
+        FleetHost(name="c", capacity=4.0),
+    ]
+    load_factor = 1.1
+
+    plan = plan_placement(servers, hosts, load_factor=load_factor)
+
+    _total_cost = sum(estimate_server_cost(s) for s in servers)
+    _max_cost = max(estimate_server_cost(s) for s in servers)
+    for _host in hosts:
+        _bound = max(load_factor * _total_cost * _host.capacity / 7.0, _max_cost)
+        assert plan.host_loads[_host.name] <= _bound + 1e-9
+    assert sum(plan.host_loads.values()) == pytest.approx(_total_cost)
+    assert len(plan.assignments) == len(servers)
+
+
+def test_adding_a_host_only_moves_servers_onto_it():
+    servers = make_servers(1_000)
+    before = plan_placement(servers, make_hosts("a", "b", "c"), load_factor=UNBOUNDED)
+    after = plan_placement(
+        servers, make_hosts("a", "b", "c", "d"), load_factor=UNBOUNDED
+    )
+
+    moved = after.moved_from(before)
+
+    assert {_new for _old, _new in moved.values()} == {"d"}
+    assert set(moved) == set(after.servers_on("d"))
+    assert 0.2 < len(moved) / len(servers) < 0.3
+
+
+def test_removing_a_host_only_moves_its_servers():
+    servers = make_servers(1_000)
+    before = plan_placement(
+        servers, make_hosts("a", "b", "c", "d"), load_factor=UNBOUNDED
+    )
+    after = plan_placement(servers, make_hosts("a", "b", "c"), load_factor=UNBOUNDED)
+
+    moved = after.moved_from(before)
+
+    assert set(moved) == set(before.servers_on("d"))
+    assert {_old for _old, _new in moved.values()} == {"d"}
+
+
+def test_bounded_loads_move_few_servers_on_host_add():
+    servers = make_servers(1_000)
+    before = plan_placement(servers, make_hosts("a", "b", "c"))
+    after = plan_placement(servers, make_hosts("a", "b", "c", "d"))
+
+    ## A quarter of the fleet must move to fill the new host, spills add a little
+    assert len(after.moved_from(before)) / len(servers) < 0.4
+
+
+def test_pinned_server_stays_on_its_host():
+    servers = make_servers(50)
+    servers[0].host = "b"
+
+    plan = plan_placement(servers, make_hosts("a", "b"))
+
+    assert plan.assignments["server_0"] == "b"
+
+
+def test_pin_to_unknown_host_raises():
+    servers = make_servers(2)
+    servers[0].host = "missing"
+
+    with pytest.raises(ValueError):
+        plan_placement(servers, make_hosts("a", "b"))
+
+
+def test_duplicate_server_names_raise():
+    with pytest.raises(ValueError):
+        plan_placement(make_servers(2) + make_servers(1), make_hosts("a"))
+
+
+def test_generate_host_trees_writes_one_tree_per_host(tmp_path: Path):
+    servers = make_servers(6)
+    hosts = [
+        FleetHost(name=_name, output_path=str(tmp_path / _name)) for _name in ("a", "b")
+    ]
+    plan = plan_placement(servers, hosts)
+
+    created = generate_host_trees(servers, hosts, plan=plan, max_workers=2)
+
+    for _host in hosts:
+        assert len(created.get(_host.name, [])) == len(plan.servers_on(_host.name))
+        for _server in plan.servers_on(_host.name):
+            assert (tmp_path / _host.name / _server / "recreate_server.sh").is_file()
+    ## The passed-in servers are not modified
+    assert all(s.host is None for s in servers)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+
+from gameserver_ctrl.domain.minecraft.player_lookup import (
+    MojangProfileResolver,
+    PlayerLookupError,
+)
+from gameserver_ctrl.domain.minecraft.schemas import WhitelistPlayer
+
+import httpx
+import pytest
+
+## Stub accounts served by the fake lookup endpoint, {name: uuid-hex}
+STUB_PROFILES: dict[str, str] = {
+    f"player{i}": f"{i:032x}" for i in range(25)
+}
+
+
+class StubLookupAPI:
+    """Fake Mojang bulk lookup endpoint that records every request it gets."""
+
+    def __init__(self, rate_limit_first: int = 0) -> None:
+        """Answer with 429 for the first rate_limit_first requests."""
+        self.requests: list[list[str]] = []
+        self.rate_limit_first: int = rate_limit_first
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        """Handle one POST of usernames."""
+        _names = json.loads(request.content)
+        self.requests.append(_names)
+
+        if len(self.requests) <= self.rate_limit_first:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if len(_names) > 10:
+            return httpx.Response(400, json={"error": "Too many names"})
+
+        return httpx.Response(
+            200,
+            json=[
+                {"id": STUB_PROFILES[n.lower()], "name": n}
+                for n in _names
+                if n.lower() in STUB_PROFILES
+            ],
+        )
+
+
+@pytest.fixture
+def make_resolver(tmp_path):
+    _resolvers: list[MojangProfileResolver] = []
+
+    def _make(api: StubLookupAPI) -> MojangProfileResolver:
+        _resolver = MojangProfileResolver(
+            cache_dir=tmp_path / "cache",
+            client=httpx.Client(
+                base_url="https://stub", transport=httpx.MockTransport(api)
+            ),
+        )
+        _resolvers.append(_resolver)
+
+        return _resolver
+
+    yield _make
+
+    for _resolver in _resolvers:
+        _resolver.close()
+
+
+def test_batches_at_ten_names(make_resolver):
+    api = StubLookupAPI()
+    resolved = make_resolver(api).resolve([f"player{i}" for i in range(25)])
+
+    assert [len(r) for r in api.requests] == [10, 10, 5]
+    assert resolved["player3"] == "00000000-0000-0000-0000-000000000003"
+
+
+def test_cache_hit_makes_no_request(make_resolver):
+    api = StubLookupAPI()
+    make_resolver(api).resolve(["player1", "Player2"])
+
+    ## A new resolver on the same cache dir, i.e. the next run
+    again = StubLookupAPI()
+    resolved = make_resolver(again).resolve(["PLAYER1", "player2"])
+
+    assert again.requests == []
+    assert resolved["player1"] == "00000000-0000-0000-0000-000000000001"
+
+
+def test_misses_are_cached(make_resolver):
+    api = StubLookupAPI()
+    resolver = make_resolver(api)
+
+    assert resolver.resolve(["nobody"]) == {"nobody": None}
+    assert resolver.resolve(["nobody"]) == {"nobody": None}
+    assert api.requests == [["nobody"]]
+
+
+def test_retries_after_rate_limit(make_resolver):
+    api = StubLookupAPI(rate_limit_first=2)
+    resolved = make_resolver(api).resolve(["player7"])
+
+    assert len(api.requests) == 3
+    assert resolved["player7"] == "00000000-0000-0000-0000-000000000007"
+
+
+def test_gives_up_when_still_rate_limited(make_resolver):
+    with pytest.raises(PlayerLookupError):
+        make_resolver(StubLookupAPI(rate_limit_first=10)).resolve(["player7"])
+
+
+def test_unresolved_players_never_keep_none_id(make_resolver):
+    players = [WhitelistPlayer(name="player1"), WhitelistPlayer(name="nobody")]
+    resolver = make_resolver(StubLookupAPI())
+
+    filled = resolver.fill_missing_ids(players)
+    assert [(p.name, str(p.id)) for p in filled] == [
+        ("player1", "00000000-0000-0000-0000-000000000001")
+    ]
+
+    with pytest.raises(PlayerLookupError):
+        resolver.fill_missing_ids(players, drop_unresolved=False)
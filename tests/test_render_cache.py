@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import io
+import tarfile
+
+from gameserver_ctrl.domain.minecraft import (
+    RenderCache,
+    create_servers,
+    export_fleet,
+    load_servers,
+)
+
+import pytest
+
+PLAYERS: list[dict] = [
+    {"id": "00000000-0000-0000-0000-000000000001", "name": "Steve"},
+    {"id": "00000000-0000-0000-0000-000000000002", "name": "Alex"},
+]
+
+
+def make_servers(count: int, output_path: str | None = None):
+    return load_servers(
+        [
+            {
+                "name": f"forge_server_{i}",
+                "output_path": output_path,
+                "env_file": {
+                    "env_data": {
+                        "container_name": f"mc-server_forge_{i}",
+                        "server_port": 25565 + i,
+                    }
+                },
+                "whitelist_file": {"whitelist_players": PLAYERS},
+                "compose_file": {},
+            }
+            for i in range(count)
+        ]
+    )
+
+
+def test_only_repeatable_kinds_are_deduplicated(tmp_path):
+    cache = create_servers(make_servers(3, str(tmp_path)))
+
+    ## whitelist & compose: 1 render & 2 copies each. env & script aren't cached
+    assert cache.rendered == 2
+    assert cache.reused == 4
+    assert (tmp_path / "forge_server_2" / ".env").exists()
+
+    _whitelists = [tmp_path / f"forge_server_{i}" / "whitelist.json" for i in range(3)]
+    assert len({w.read_text() for w in _whitelists}) == 1
+    ## Copies by default, so editing one server's file leaves the others alone
+    assert {w.stat().st_nlink for w in _whitelists} == {1}
+
+
+def test_hardlinks_are_opt_in(tmp_path):
+    create_servers(make_servers(3, str(tmp_path)), link_mode="hardlink")
+
+    assert (tmp_path / "forge_server_0" / "whitelist.json").stat().st_nlink == 3
+
+
+def test_backend_keeps_only_repeatable_renders(monkeypatch):
+    _caches: list[RenderCache] = []
+    _init = RenderCache.__init__
+
+    def _track(self, *args, **kwargs) -> None:
+        _init(self, *args, **kwargs)
+        _caches.append(self)
+
+    monkeypatch.setattr(RenderCache, "__init__", _track)
+
+    _target = io.BytesIO()
+    export_fleet(make_servers(5), _target)
+
+    ## One whitelist & one compose render, however many servers
+    assert len(_caches[0]._renders) == 2
+
+    with tarfile.open(fileobj=io.BytesIO(_target.getvalue()), mode="r:gz") as _tar:
+        _names = _tar.getnames()
+    assert "forge_server_4/whitelist.json" in _names
+    assert "forge_server_4/.env" in _names
+
+
+def test_invalid_link_mode():
+    with pytest.raises(ValueError):
+        RenderCache(link_mode="symlink")
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+import struct
+
+from gameserver_ctrl.domain.minecraft.sleep_proxy import (
+    STATE_LOGIN,
+    STATE_STATUS,
+    SleepProxy,
+    SleepProxyConfig,
+    encode_packet,
+    encode_string,
+    encode_varint,
+    parse_handshake,
+    query_status,
+    read_packet,
+)
+
+BACKEND_STATUS: dict = {
+    "version": {"name": "Forge 1.20.1", "protocol": 763},
+    "players": {"max": 20, "online": 3, "sample": []},
+    "description": {"text": "Test server"},
+}
+LOGIN_REPLY: bytes = encode_packet(0x02, b"welcome")
+
+
+def free_port() -> int:
+    with socket.socket() as _sock:
+        _sock.bind(("127.0.0.1", 0))
+        return _sock.getsockname()[1]
+
+
+class FakeBackend:
+    """Minimal local Minecraft server: answers status pings & accepts logins.
+
+    Its start() & stop() stand in for `docker start`/`docker stop`, and record
+    every call in self.calls.
+    """
+
+    def __init__(self, port: int, stop_delay: float = 0.0) -> None:
+        """Listen on port once started. stop() takes stop_delay seconds."""
+        self.port: int = port
+        self.stop_delay: float = stop_delay
+        self.calls: list[str] = []
+        self._server: asyncio.Server | None = None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            _, _body = await read_packet(reader)
+            _, _, _, _next_state = parse_handshake(_body)
+            await read_packet(reader)
+
+            if _next_state == STATE_STATUS:
+                writer.write(encode_packet(0x00, encode_string(json.dumps(BACKEND_STATUS))))
+            else:
+                writer.write(LOGIN_REPLY)
+            await writer.drain()
+            await reader.read()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> None:
+        self.calls.append("start")
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", self.port)
+
+    async def stop(self) -> None:
+        self.calls.append("stop")
+        await asyncio.sleep(self.stop_delay)
+        self._server.close()
+        await self._server.wait_closed()
+        self.calls.append("stopped")
+
+
+def make_proxy(backend: FakeBackend, **config) -> SleepProxy:
+    return SleepProxy(
+        SleepProxyConfig(
+            name="test",
+            listen_host="127.0.0.1",
+            listen_port=free_port(),
+            backend_port=backend.port,
+            **{"idle_timeout": 60, "check_interval": 0.05, "hold_login": 5, **config},
+        ),
+        start_backend=backend.start,
+        stop_backend=backend.stop,
+    )
+
+
+async def login(port: int) -> bytes:
+    """Connect as a player and return the first reply."""
+    _reader, _writer = await asyncio.open_connection("127.0.0.1", port)
+    _handshake = (
+        encode_varint(763)
+        + encode_string("127.0.0.1")
+        + struct.pack(">H", port)
+        + encode_varint(STATE_LOGIN)
+    )
+    _writer.write(encode_packet(0x00, _handshake) + encode_packet(0x00, encode_string("Steve")))
+    await _writer.drain()
+
+    _raw, _ = await asyncio.wait_for(read_packet(_reader), 10)
+    _writer.close()
+
+    return _raw
+
+
+def test_sleep_status_wake_on_login_and_idle_stop():
+    async def _run() -> None:
+        backend = FakeBackend(free_port())
+        proxy = make_proxy(backend, idle_timeout=0.3)
+        await proxy.start()
+
+        try:
+            ## Asleep: status is answered by the proxy itself
+            _status = await query_status("127.0.0.1", proxy.config.listen_port)
+            assert proxy.state == "stopped"
+            assert _status["players"]["online"] == 0
+            assert proxy.config.sleeping_motd in _status["description"]["text"]
+            assert backend.calls == []
+
+            ## A login wakes the backend and is let straight through
+            assert await login(proxy.config.listen_port) == LOGIN_REPLY
+            assert proxy.state == "running"
+            assert backend.calls == ["start"]
+            assert proxy.status_cache == BACKEND_STATUS
+
+            ## No players for idle_timeout: the backend is stopped
+            for _ in range(40):
+                if proxy.state == "stopped":
+                    break
+                await asyncio.sleep(0.05)
+            assert proxy.state == "stopped"
+            assert backend.calls == ["start", "stop", "stopped"]
+        finally:
+            await proxy.close()
+
+    asyncio.run(_run())
+
+
+def test_login_during_stop_waits_for_stop():
+    async def _run() -> None:
+        backend = FakeBackend(free_port(), stop_delay=0.3)
+        proxy = make_proxy(backend)
+        await backend.start()
+        await proxy.start()
+        assert proxy.state == "running"
+
+        try:
+            _sleep = asyncio.create_task(proxy.sleep())
+            while proxy.state != "stopping":
+                await asyncio.sleep(0.01)
+
+            ## Arrives while stop_backend is still running
+            assert await login(proxy.config.listen_port) == LOGIN_REPLY
+            await _sleep
+
+            assert proxy.state == "running"
+            assert proxy._ready.is_set()
+            assert backend.calls == ["start", "stop", "stopped", "start"]
+        finally:
+            await proxy.close()
+            await backend.stop()
+
+    asyncio.run(_run())
+
+
+def test_status_pings_do_not_keep_backend_awake():
+    async def _run() -> None:
+        backend = FakeBackend(free_port())
+        proxy = make_proxy(backend, idle_timeout=0.3)
+        await backend.start()
+        await proxy.start()
+        assert proxy.state == "running"
+
+        try:
+            ## Ping like a server list or uptime monitor, more often than idle_timeout
+            for _ in range(40):
+                if proxy.state == "stopped":
+                    break
+                await query_status("127.0.0.1", proxy.config.listen_port)
+                await asyncio.sleep(0.05)
+
+            assert proxy.state == "stopped"
+            assert backend.calls == ["start", "stop", "stopped"]
+        finally:
+            await proxy.close()
+
+    asyncio.run(_run())
+
+
+def test_sleep_while_login_connects_keeps_backend_up(monkeypatch):
+    _open_connection = asyncio.open_connection
+
+    async def _slow_backend_connect(host, port, **kwargs):
+        if port == backend.port:
+            await asyncio.sleep(0.3)
+        return await _open_connection(host, port, **kwargs)
+
+    backend = FakeBackend(free_port())
+    monkeypatch.setattr(asyncio, "open_connection", _slow_backend_connect)
+
+    async def _run() -> None:
+        proxy = make_proxy(backend)
+        await backend.start()
+        await proxy.start()
+        assert proxy.state == "running"
+
+        try:
+            _login = asyncio.create_task(login(proxy.config.listen_port))
+            ## The proxy is now connecting to the backend for this login
+            await asyncio.sleep(0.1)
+            await proxy.sleep()
+
+            assert await _login == LOGIN_REPLY
+            assert proxy.state == "running"
+            assert backend.calls == ["start"]
+        finally:
+            await proxy.close()
+            await backend.stop()
+
+    asyncio.run(_run())
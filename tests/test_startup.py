@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+
+from gameserver_ctrl.domain.minecraft.startup import StartupJob, StartupScheduler
+
+import pytest
+
+## Stub start commands, standing in for `docker compose up -d`
+START_OK: list[str] = [sys.executable, "-c", "pass"]
+START_FAIL: list[str] = [sys.executable, "-c", "import sys; sys.exit(3)"]
+START_HANG: list[str] = [sys.executable, "-c", "import time; time.sleep(60)"]
+
+
+class FakeProbe:
+    """Health probe that reports a job healthy after `polls` probes.
+
+    Records the order jobs were first probed in (their admission order), and
+    checks the scheduler's budgets on every probe.
+    """
+
+    def __init__(self, scheduler: StartupScheduler, polls: int = 3) -> None:
+        """Attach to scheduler as its health probe."""
+        self.scheduler: StartupScheduler = scheduler
+        self.polls: int = polls
+        self.admitted: list[str] = []
+        self.max_cpu_in_use: float = 0.0
+        self.max_memory_in_use: int = 0
+        self._counts: dict[str, int] = {}
+
+        scheduler.health_probe = self
+
+    async def __call__(self, job: StartupJob) -> bool:
+        """Probe job once."""
+        if job.name not in self._counts:
+            self.admitted.append(job.name)
+        self._counts[job.name] = self._counts.get(job.name, 0) + 1
+
+        self.max_cpu_in_use = max(self.max_cpu_in_use, self.scheduler._cpu_in_use)
+        self.max_memory_in_use = max(
+            self.max_memory_in_use, self.scheduler._memory_in_use
+        )
+
+        return self._counts[job.name] >= self.polls
+
+
+def make_jobs() -> list[StartupJob]:
+    """Jobs with no start_cmd, so each is probed as soon as it's admitted."""
+    return [
+        StartupJob(name="lobby", priority=10, cpu_cost=1.0, memory_mb=2048),
+        StartupJob(name="survival", priority=5, cpu_cost=2.0, memory_mb=4096),
+        StartupJob(name="creative", priority=5, cpu_cost=1.0, memory_mb=2048),
+        StartupJob(name="minigames", priority=1, cpu_cost=1.5, memory_mb=3072),
+        StartupJob(name="event", priority=0, cpu_cost=0.5, memory_mb=1024),
+    ]
+
+
+def test_admits_by_priority_within_budget():
+    scheduler = StartupScheduler(cpu_budget=3.0, memory_budget_mb=6144, poll_interval=0.01)
+    probe = FakeProbe(scheduler)
+
+    results = asyncio.run(scheduler.run(make_jobs()))
+
+    assert {r.status for r in results} == {"healthy"}
+    assert probe.admitted == ["lobby", "creative", "survival", "minigames", "event"]
+    assert probe.max_cpu_in_use <= 3.0
+    assert probe.max_memory_in_use <= 6144
+    assert scheduler._cpu_in_use == 0 and scheduler._booting == 0
+
+
+def test_oversized_job_boots_alone():
+    scheduler = StartupScheduler(cpu_budget=1.0, poll_interval=0.01)
+    probe = FakeProbe(scheduler)
+
+    asyncio.run(
+        scheduler.run(
+            [
+                StartupJob(name="huge", priority=1, cpu_cost=4.0, start_cmd=START_OK),
+                StartupJob(name="small", cpu_cost=0.5, start_cmd=START_OK),
+            ]
+        )
+    )
+
+    assert probe.admitted == ["huge", "small"]
+    assert probe.max_cpu_in_use == 4.0
+
+
+def test_failed_start_frees_budget():
+    scheduler = StartupScheduler(cpu_budget=1.0, poll_interval=0.01)
+    FakeProbe(scheduler)
+
+    results = asyncio.run(
+        scheduler.run(
+            [
+                StartupJob(name="broken", priority=1, start_cmd=START_FAIL),
+                StartupJob(name="ok", start_cmd=START_OK),
+            ]
+        )
+    )
+
+    assert {r.name: r.status for r in results} == {"broken": "failed", "ok": "healthy"}
+
+
+def test_hung_probe_times_out_at_health_timeout():
+    async def _hung_probe(job: StartupJob) -> bool:
+        await asyncio.sleep(60)
+        return True
+
+    scheduler = StartupScheduler(health_probe=_hung_probe, poll_interval=0.01)
+    results = asyncio.run(
+        scheduler.run([StartupJob(name="hung", start_cmd=START_OK, health_timeout=0.3)])
+    )
+
+    assert results[0].status == "timeout"
+    assert results[0].boot_time == pytest.approx(0.3, abs=0.2)
+
+
+def test_hung_start_is_killed_at_health_timeout():
+    scheduler = StartupScheduler(cpu_budget=1.0, poll_interval=0.01)
+    probe = FakeProbe(scheduler)
+
+    results = asyncio.run(
+        scheduler.run(
+            [
+                StartupJob(
+                    name="hung", priority=1, start_cmd=START_HANG, health_timeout=0.3
+                ),
+                StartupJob(name="ok", start_cmd=START_OK),
+            ]
+        )
+    )
+
+    _results = {r.name: r for r in results}
+    assert _results["hung"].status == "failed"
+    assert _results["hung"].boot_time == pytest.approx(0.3, abs=0.2)
+    ## The hung job's budget was released, so the next job still booted
+    assert _results["ok"].status == "healthy"
+    assert probe.admitted == ["ok"]
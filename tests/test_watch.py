@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import shutil
+
+from gameserver_ctrl.domain.minecraft.server_gen import mc_containers_dir
+from gameserver_ctrl.domain.minecraft.watch import FleetWatcher, PollingWatcher
+
+import pytest
+import yaml
+
+SERVER_NAMES: tuple[str, ...] = ("forge_server_0", "forge_server_1")
+
+
+def write_manifest(
+    path: Path,
+    output_dir: Path,
+    compose_dir: Path,
+    ports: tuple[int, ...] = (25565, 25566),
+) -> None:
+    _servers = [
+        {
+            "name": _name,
+            "output_path": str(output_dir),
+            "env_file": {
+                "env_data": {
+                    "container_name": f"mc-server_{_name}",
+                    "server_port": ports[i],
+                }
+            },
+            "whitelist_file": {
+                "whitelist_players": [
+                    {"id": "00000000-0000-0000-0000-000000000001", "name": "Steve"}
+                ]
+            },
+            "compose_file": {"template_dir": str(compose_dir)},
+        }
+        for i, _name in enumerate(SERVER_NAMES)
+    ]
+    path.write_text(yaml.safe_dump({"servers": _servers}))
+
+
+def touch(path: Path) -> None:
+    """Move path's mtime forward, so a polling scan sees it changed."""
+    _mtime = path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(_mtime, _mtime))
+
+
+def output_inodes(output_dir: Path) -> dict[str, int]:
+    """Map each rendered file to its inode.
+
+    Rendering replaces files, so a re-rendered file gets a new inode.
+    """
+    return {
+        str(p.relative_to(output_dir)): p.stat().st_ino
+        for p in output_dir.rglob("*")
+        if p.is_file()
+    }
+
+
+@pytest.fixture
+def fleet(tmp_path: Path):
+    """Render a two-server fleet, with its compose template copied into tmp_path."""
+    _templates = tmp_path / "templates"
+    _compose_dir = _templates / "forge_server"
+    shutil.copytree(f"{mc_containers_dir}/forge_server", _compose_dir)
+
+    _output = tmp_path / "output"
+    _manifest = tmp_path / "fleet.yml"
+    write_manifest(_manifest, _output, _compose_dir)
+
+    _watcher = FleetWatcher(_manifest, templates_dir=_templates)
+    _watcher.render_all()
+    _poller = PollingWatcher([_templates, _manifest], interval=0)
+
+    return _watcher, _poller, _manifest, _output, _compose_dir
+
+
+def changed_outputs(before: dict[str, int], after: dict[str, int]) -> set[str]:
+    return {p for p, ino in after.items() if before.get(p) != ino}
+
+
+def test_template_edit_rerenders_only_its_kind(fleet):
+    watcher, poller, _manifest, output, compose_dir = fleet
+    before = output_inodes(output)
+
+    _template = compose_dir / "template_docker-compose.j2"
+    _template.write_text(_template.read_text() + "\n# edited\n")
+    touch(_template)
+
+    targets = watcher.handle_changes(poller.wait(timeout=0))
+
+    assert targets == {_name: {"compose"} for _name in SERVER_NAMES}
+    assert changed_outputs(before, output_inodes(output)) == {
+        f"{_name}/docker-compose.yml" for _name in SERVER_NAMES
+    }
+    for _name in SERVER_NAMES:
+        assert "# edited" in (output / _name / "docker-compose.yml").read_text()
+
+
+def test_env_data_edit_rerenders_only_that_servers_env(fleet):
+    watcher, poller, manifest, output, compose_dir = fleet
+    before = output_inodes(output)
+
+    write_manifest(manifest, output, compose_dir, ports=(25999, 25566))
+    touch(manifest)
+
+    targets = watcher.handle_changes(poller.wait(timeout=0))
+
+    assert targets == {"forge_server_0": {"env"}}
+    assert changed_outputs(before, output_inodes(output)) == {"forge_server_0/.env"}
+    assert "25999" in (output / "forge_server_0" / ".env").read_text()
+
+
+def test_unchanged_manifest_rerenders_nothing(fleet):
+    watcher, poller, manifest, output, _compose_dir = fleet
+    before = output_inodes(output)
+
+    touch(manifest)
+
+    assert watcher.handle_changes(poller.wait(timeout=0)) == {}
+    assert output_inodes(output) == before
+
+
+def test_template_index_maps_templates_to_kinds(fleet):
+    watcher, _poller, _manifest, _output, compose_dir = fleet
+
+    _compose = (compose_dir / "template_docker-compose.j2").resolve()
+    assert watcher._template_deps[_compose] == {
+        (_name, "compose") for _name in SERVER_NAMES
+    }